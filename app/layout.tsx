@@ -5,6 +5,8 @@ import { AuthProvider } from '@/components/auth-provider'
 
 const inter = Inter({ subsets: ['latin'] })
 
+const SUPABASE_URL = process.env.NEXT_PUBLIC_SUPABASE_URL
+
 export const metadata: Metadata = {
   title: 'ObitFinder CRM',
   description: 'Pipeline CRM for Family Outreach Management',
@@ -17,6 +19,17 @@ export default function RootLayout({
 }) {
   return (
     <html lang="pt-BR">
+      <head>
+        {/* Open the TCP/TLS connection to Supabase while the page loads, so the
+            first auth/data request does not pay for the handshake.
+            Supabase requests are CORS without credentials, hence anonymous. */}
+        {SUPABASE_URL && (
+          <>
+            <link rel="preconnect" href={SUPABASE_URL} crossOrigin="anonymous" />
+            <link rel="dns-prefetch" href={SUPABASE_URL} />
+          </>
+        )}
+      </head>
       <body className={inter.className}>
         <AuthProvider>
           <div className="min-h-screen bg-gray-50">
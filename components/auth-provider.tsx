@@ -1,9 +1,10 @@
 "use client"
 
-import { createContext, useContext, useEffect, useState, useMemo, useRef } from 'react'
+import { createContext, useContext, useEffect, useState, useRef } from 'react'
 import { Session, User, AuthChangeEvent } from '@supabase/supabase-js'
 import { Profile } from '@/lib/types'
-import { createClient } from '@/lib/supabase/client'
+import { supabase } from '@/lib/supabase'
+import { invalidateCache } from '@/lib/cache'
 
 // Session will be considered stale after 30 minutes of inactivity
 const SESSION_STALE_TIME = 30 * 60 * 1000 // 30 minutes
@@ -25,9 +26,8 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
   const [isLoading, setIsLoading] = useState(true)
   const lastActivityRef = useRef<number>(Date.now())
   const isRefreshingRef = useRef<boolean>(false)
-  
-  // Create supabase client once
-  const supabase = useMemo(() => createClient(), [])
+  // Account the read cache was filled for
+  const cacheUserIdRef = useRef<string | null>(null)
   
   // Update last activity timestamp on user interaction
   useEffect(() => {
@@ -90,7 +90,7 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
     return () => {
       document.removeEventListener('visibilitychange', handleVisibilityChange)
     }
-  }, [supabase])
+  }, [])
 
   const fetchProfile = async (userId: string) => {
     try {
@@ -173,6 +173,15 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
     const { data: { subscription } } = supabase.auth.onAuthStateChange(async (event: AuthChangeEvent, session: Session | null) => {
       if (!mounted) return
       console.log('Auth state changed:', event)
+
+      // The read cache is module-level and survives navigation to /login, so
+      // drop it when the account changes. SIGNED_IN is also emitted when the
+      // session is recovered (e.g. on tab focus), so compare user ids.
+      const userId = session?.user?.id ?? null
+      if (event === 'SIGNED_OUT' || userId !== cacheUserIdRef.current) {
+        invalidateCache()
+      }
+      cacheUserIdRef.current = userId
       
       setSession(session)
       setUser(session?.user ?? null)
@@ -192,10 +201,11 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
       clearTimeout(loadingTimeout)
       subscription.unsubscribe()
     }
-  }, [supabase])
+  }, [])
 
   const signOut = async () => {
     await supabase.auth.signOut()
+    invalidateCache()
   }
 
   return (
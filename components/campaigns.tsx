@@ -1,6 +1,6 @@
 "use client"
 
-import { useState, useEffect, useCallback } from 'react'
+import { useState, useEffect, useCallback, useMemo } from 'react'
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card'
 import { Button } from '@/components/ui/button'
 import { Input } from '@/components/ui/input'
@@ -15,7 +15,9 @@ import {
   DialogHeader,
   DialogTitle,
 } from '@/components/ui/dialog'
-import { supabase, PIPELINE_STAGES } from '@/lib/supabase'
+import { supabase, applyCardFilters, fetchEstados, filtersKey, CARD_COLUMNS, PIPELINE_STAGES } from '@/lib/supabase'
+import { cached, invalidateCache } from '@/lib/cache'
+import { nextDay } from '@/lib/utils'
 import { useAuth } from '@/components/auth-provider'
 import type { Campaign, CampaignFilters, CampaignStatus, ContactCard as ContactCardType, Filters } from '@/lib/types'
 import { CAMPAIGN_PLATFORMS } from '@/lib/types'
@@ -40,6 +42,7 @@ import {
 } from 'lucide-react'
 
 const LEADS_PER_PAGE = 50
+const LEADS_CACHE_TTL = 60_000
 
 const STATUS_CONFIG: Record<CampaignStatus, { label: string; color: string; bgColor: string }> = {
   'active': { label: 'Ativa', color: 'text-green-700', bgColor: 'bg-green-100' },
@@ -77,14 +80,18 @@ export function Campaigns() {
     platforms: [] as string[],
     selectedLeads: [] as string[],
   })
+  // Ids of the leads the campaign had when the modal opened, to save only the
+  // difference. Kept as a Set snapshot so it is never copied or rebuilt.
+  const [originalLeads, setOriginalLeads] = useState<ReadonlySet<string>>(new Set())
   const [customPlatform, setCustomPlatform] = useState('')
+  // O(1) membership checks for the lead rows instead of scanning selectedLeads per row
+  const selectedLeadIds = useMemo(() => new Set(formData.selectedLeads), [formData.selectedLeads])
   
   // Lead selection
   const [availableLeads, setAvailableLeads] = useState<ContactCardType[]>([])
   const [loadingLeads, setLoadingLeads] = useState(false)
   const [leadsPage, setLeadsPage] = useState(1)
   const [hasMoreLeads, setHasMoreLeads] = useState(true)
-  const [totalLeadsCount, setTotalLeadsCount] = useState(0)
   const [estados, setEstados] = useState<string[]>([])
   
   // Lead filters (for modal)
@@ -120,7 +127,7 @@ export function Campaigns() {
     try {
       let query = supabase
         .from('campaigns')
-        .select('*, campaign_leads(count)')
+        .select('id, name, description, status, platforms, created_at, campaign_leads(count)')
         .order('created_at', { ascending: false })
 
       // Apply filters
@@ -137,7 +144,7 @@ export function Campaigns() {
         query = query.gte('created_at', filters.dateFrom)
       }
       if (filters.dateTo) {
-        query = query.lte('created_at', filters.dateTo + 'T23:59:59')
+        query = query.lt('created_at', nextDay(filters.dateTo))
       }
 
       const { data, error } = await query
@@ -163,16 +170,9 @@ export function Campaigns() {
 
   // Fetch estados for filter dropdown
   useEffect(() => {
-    const fetchEstados = async () => {
-      const { data } = await supabase
-        .from('casos')
-        .select('estado')
-        .not('estado', 'is', null)
-      
-      const uniqueEstados = Array.from(new Set(data?.map((e: any) => e.estado).filter(Boolean)))
-      setEstados(uniqueEstados.sort() as string[])
-    }
     fetchEstados()
+      .then(setEstados)
+      .catch(err => console.error('Error fetching estados:', err))
   }, [])
 
   // Fetch leads for selection with filters and pagination
@@ -181,81 +181,29 @@ export function Campaigns() {
     try {
       const limit = LEADS_PER_PAGE
       const offset = (page - 1) * limit
-      
-      // Check if we have any case-related filters
-      const hasCaseFilters = leadFilters.caseName || leadFilters.caseCpf || leadFilters.cidade || leadFilters.estado || leadFilters.dateFrom || leadFilters.dateTo
-      const caseModifier = hasCaseFilters ? '!inner' : ''
-
-      let query = supabase
-        .from('relacionamentos')
-        .select(`
-          contatos!inner(id, nome, cpf, telefone_1, status, scheduled_for),
-          casos${caseModifier}(id, nome, cpf, cidade, estado, data_obito)
-        `)
-        .range(offset, offset + limit - 1)
-
-      // Apply contact filters
-      if (leadFilters.contactName) {
-        query = query.ilike('contatos.nome', `%${leadFilters.contactName}%`)
-      }
-      if (leadFilters.contactCpf) {
-        query = query.ilike('contatos.cpf', `%${leadFilters.contactCpf}%`)
-      }
-      if (leadFilters.status && leadFilters.status !== 'ALL') {
-        query = query.eq('contatos.status', leadFilters.status)
-      }
-      
-      // Apply case filters
-      if (leadFilters.caseName) {
-        query = query.ilike('casos.nome', `%${leadFilters.caseName}%`)
-      }
-      if (leadFilters.caseCpf) {
-        query = query.ilike('casos.cpf', `%${leadFilters.caseCpf}%`)
-      }
-      if (leadFilters.cidade) {
-        query = query.ilike('casos.cidade', `%${leadFilters.cidade}%`)
-      }
-      if (leadFilters.estado) {
-        query = query.eq('casos.estado', leadFilters.estado)
-      }
-      if (leadFilters.dateFrom) {
-        query = query.gte('casos.data_obito', leadFilters.dateFrom)
-      }
-      if (leadFilters.dateTo) {
-        query = query.lte('casos.data_obito', leadFilters.dateTo)
-      }
-
-      const { data, error } = await query
 
-      if (error) throw error
+      // Pages are cached per (page, filters), so reopening the modal or going
+      // back to earlier filters does not hit the database again
+      const leads = await cached(`campaign-leads:${page}:${filtersKey(leadFilters)}`, LEADS_CACHE_TTL, async () => {
+        // v_pipeline_cards computes phone_display/all_phones in SQL and returns
+        // one row per contact, so rows map straight to cards
+        let query = (supabase
+          .from('v_pipeline_cards') as any)
+          .select(CARD_COLUMNS)
+          .order('contato_id')
+          .range(offset, offset + limit - 1)
+
+        query = applyCardFilters(query, leadFilters)
+        if (leadFilters.status && leadFilters.status !== 'ALL') {
+          query = query.eq('status', leadFilters.status)
+        }
 
-      const leads: ContactCardType[] = []
-      const seenIds = new Set<string>(append ? availableLeads.map(l => l.contato_id) : [])
+        const { data, error } = await query
 
-      for (const rel of (data as any[]) || []) {
-        const contato = rel.contatos
-        const caso = rel.casos
-        if (!contato || seenIds.has(contato.id)) continue
-        seenIds.add(contato.id)
+        if (error) throw error
 
-        leads.push({
-          contato_id: contato.id,
-          contato_nome: contato.nome || 'Sem nome',
-          contato_cpf: contato.cpf,
-          phone_display: contato.telefone_1 || '',
-          all_phones: [contato.telefone_1].filter(Boolean),
-          status: contato.status || 'New',
-          notes: null,
-          caso_id: caso?.id || null,
-          caso_nome: caso?.nome || '',
-          caso_cpf: caso?.cpf || null,
-          caso_cidade: caso?.cidade,
-          caso_estado: caso?.estado,
-          caso_data_obito: caso?.data_obito?.split('T')[0] || null,
-          tipo_parentesco: null,
-          scheduled_for: contato.scheduled_for || null,
-        })
-      }
+        return (data || []) as ContactCardType[]
+      })
 
       if (append) {
         setAvailableLeads(prev => [...prev, ...leads])
@@ -264,13 +212,12 @@ export function Campaigns() {
       }
       
       setHasMoreLeads(leads.length >= limit)
-      setTotalLeadsCount(prev => append ? prev : (leads.length < limit ? leads.length : leads.length + 1))
     } catch (err) {
       console.error('Error fetching leads:', err)
     } finally {
       setLoadingLeads(false)
     }
-  }, [leadFilters, availableLeads])
+  }, [leadFilters])
 
   // Reset and fetch leads when filters change
   useEffect(() => {
@@ -335,6 +282,7 @@ export function Campaigns() {
       platforms: [],
       selectedLeads: [],
     })
+    setOriginalLeads(new Set())
     setCustomPlatform('')
     clearLeadFilters()
     setLeadsPage(1)
@@ -351,13 +299,16 @@ export function Campaigns() {
       .select('contato_id')
       .eq('campaign_id', campaign.id)
     
+    const leadIds: string[] = campaignLeads?.map((l: any) => l.contato_id) || []
+
     setFormData({
       name: campaign.name,
       description: campaign.description || '',
       status: campaign.status,
       platforms: campaign.platforms,
-      selectedLeads: campaignLeads?.map((l: any) => l.contato_id) || [],
+      selectedLeads: leadIds,
     })
+    setOriginalLeads(new Set(leadIds))
     setCustomPlatform('')
     clearLeadFilters()
     setLeadsPage(1)
@@ -370,65 +321,25 @@ export function Campaigns() {
     
     setIsSaving(true)
     try {
-      if (editingCampaign) {
-        // Update existing campaign
-        const { error } = await (supabase
-          .from('campaigns') as any)
-          .update({
-            name: formData.name,
-            description: formData.description || null,
-            status: formData.status,
-            platforms: formData.platforms,
-          })
-          .eq('id', editingCampaign.id)
-
-        if (error) throw error
-
-        // Update campaign leads
-        await (supabase
-          .from('campaign_leads') as any)
-          .delete()
-          .eq('campaign_id', editingCampaign.id)
+      // Only the leads added or removed since the modal opened
+      const removed = Array.from(originalLeads).filter(id => !selectedLeadIds.has(id))
+      const added = formData.selectedLeads.filter(id => !originalLeads.has(id))
+
+      // Campaign row and lead changes in one call (see migrations/014_save_campaign.sql)
+      const { error } = await (supabase as any).rpc('save_campaign', {
+        p_id: editingCampaign?.id ?? null,
+        p_name: formData.name,
+        p_description: formData.description || null,
+        p_status: formData.status,
+        p_platforms: formData.platforms,
+        p_created_by: profile?.id ?? null,
+        p_add_leads: added,
+        p_remove_leads: removed,
+      })
 
-        if (formData.selectedLeads.length > 0) {
-          await (supabase
-            .from('campaign_leads') as any)
-            .insert(
-              formData.selectedLeads.map(contato_id => ({
-                campaign_id: editingCampaign.id,
-                contato_id,
-              }))
-            )
-        }
-      } else {
-        // Create new campaign
-        const { data: newCampaign, error } = await (supabase
-          .from('campaigns') as any)
-          .insert({
-            name: formData.name,
-            description: formData.description || null,
-            status: formData.status,
-            platforms: formData.platforms,
-            created_by: profile?.id,
-          })
-          .select()
-          .single()
-
-        if (error) throw error
-
-        // Add leads to campaign
-        if (newCampaign && formData.selectedLeads.length > 0) {
-          await (supabase
-            .from('campaign_leads') as any)
-            .insert(
-              formData.selectedLeads.map(contato_id => ({
-                campaign_id: newCampaign.id,
-                contato_id,
-              }))
-            )
-        }
-      }
+      if (error) throw error
 
+      invalidateCache()
       setIsModalOpen(false)
       setRefreshKey(prev => prev + 1)
     } catch (err) {
@@ -971,7 +882,7 @@ export function Campaigns() {
                       <div
                         key={lead.contato_id}
                         className={`flex items-center justify-between p-2 hover:bg-gray-50 cursor-pointer border-b last:border-b-0 ${
-                          formData.selectedLeads.includes(lead.contato_id) ? 'bg-blue-50' : ''
+                          selectedLeadIds.has(lead.contato_id) ? 'bg-blue-50' : ''
                         }`}
                         onClick={() => toggleLead(lead.contato_id)}
                       >
@@ -988,7 +899,7 @@ export function Campaigns() {
                         </div>
                         <input
                           type="checkbox"
-                          checked={formData.selectedLeads.includes(lead.contato_id)}
+                          checked={selectedLeadIds.has(lead.contato_id)}
                           onChange={() => {}}
                           className="h-4 w-4 text-blue-600 rounded shrink-0 ml-2"
                         />
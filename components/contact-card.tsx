@@ -1,28 +1,44 @@
 "use client"
 
+import { memo, useEffect, useRef } from 'react'
 import { Card, CardContent } from '@/components/ui/card'
 import { Badge } from '@/components/ui/badge'
-import { Phone, User, MapPin, CalendarClock, AlertCircle } from 'lucide-react'
+import { Phone, User, Users, MapPin, CalendarClock, AlertCircle } from 'lucide-react'
 import type { ContactCard as ContactCardType } from '@/lib/types'
 import { formatPhone, formatCPF } from '@/lib/utils'
-import { STAGE_CONFIG, type PipelineStage } from '@/lib/supabase'
+import { STAGE_BADGE_VARIANT } from '@/lib/supabase'
 
 interface ContactCardProps {
   contact: ContactCardType
-  onClick: () => void
+  onClick: (contact: ContactCardType) => void
+  onPrefetch?: (contactId: string) => void
 }
 
-export function ContactCard({ contact, onClick }: ContactCardProps) {
-  const stageConfig = STAGE_CONFIG[contact.status as PipelineStage] || STAGE_CONFIG['New']
-  
-  const badgeVariant = {
-    'New': 'new',
-    'Attempted': 'attempted',
-    'In Progress': 'inProgress',
-    'Scheduled': 'scheduled',
-    'Won': 'won',
-    'Lost': 'lost'
-  }[contact.status] || 'default'
+// How long the pointer must rest on a card before its details are prefetched,
+// so sweeping across the board does not fire a query per card passed
+const PREFETCH_DELAY_MS = 150
+
+export const ContactCard = memo(function ContactCard({ contact, onClick, onPrefetch }: ContactCardProps) {
+  const badgeVariant = STAGE_BADGE_VARIANT[contact.status] || 'default'
+  const prefetchTimer = useRef<ReturnType<typeof setTimeout> | null>(null)
+
+  const cancelPrefetch = () => {
+    if (prefetchTimer.current) {
+      clearTimeout(prefetchTimer.current)
+      prefetchTimer.current = null
+    }
+  }
+
+  const schedulePrefetch = () => {
+    if (!onPrefetch) return
+    cancelPrefetch()
+    prefetchTimer.current = setTimeout(() => {
+      prefetchTimer.current = null
+      onPrefetch(contact.contato_id)
+    }, PREFETCH_DELAY_MS)
+  }
+
+  useEffect(() => cancelPrefetch, [])
 
   // Calculate remaining days for scheduled contacts
   const getScheduledInfo = () => {
@@ -55,7 +71,9 @@ export function ContactCard({ contact, onClick }: ContactCardProps) {
   return (
     <Card 
       className="contact-card cursor-pointer hover:border-blue-300 transition-all"
-      onClick={onClick}
+      onClick={() => onClick(contact)}
+      onMouseEnter={schedulePrefetch}
+      onMouseLeave={cancelPrefetch}
     >
       <CardContent className="p-4">
         {/* Header with name and status */}
@@ -86,6 +104,15 @@ export function ContactCard({ contact, onClick }: ContactCardProps) {
           <div className="flex items-center gap-2 text-sm text-gray-500 mb-1">
             <User className="h-4 w-4 shrink-0" />
             <span className="truncate font-medium">{contact.caso_nome || 'Falecido desconhecido'}</span>
+            {(contact.caso_relatives_count ?? 0) > 1 && (
+              <span
+                className="ml-auto flex items-center gap-1 text-xs text-gray-400 shrink-0"
+                title="Familiares cadastrados"
+              >
+                <Users className="h-3 w-3" />
+                {contact.caso_relatives_count}
+              </span>
+            )}
           </div>
           
           {contact.tipo_parentesco && (
@@ -130,4 +157,4 @@ export function ContactCard({ contact, onClick }: ContactCardProps) {
       </CardContent>
     </Card>
   )
-}
+})
@@ -13,21 +13,90 @@ import {
   Phone, User, MapPin, Calendar, FileText, Upload, 
   Trophy, XCircle, Clock, CheckCircle, Users, AlertTriangle, CalendarClock
 } from 'lucide-react'
-import { supabase, PIPELINE_STAGES, type PipelineStage } from '@/lib/supabase'
+import { supabase, PIPELINE_STAGES, STAGE_BADGE_VARIANT, type PipelineStage } from '@/lib/supabase'
+import { cached, invalidateCache } from '@/lib/cache'
 import { formatPhone, formatCPF, formatDate } from '@/lib/utils'
-import type { ContactDetails, RelativeInfo, Contato } from '@/lib/types'
+import type { ContactCard, ContactDetails, RelativeInfo, Contato } from '@/lib/types'
 
 interface ContactDetailProps {
   contactId: string | null
+  // The clicked card, already in memory, shown while the details load
+  preview?: ContactCard | null
   isOpen: boolean
   onClose: () => void
   onUpdate: () => void
 }
 
-export function ContactDetailModal({ contactId, isOpen, onClose, onUpdate }: ContactDetailProps) {
+// Every write in the app calls invalidateCache(), so the TTL only bounds how
+// long changes made by other users can go unseen
+const DETAILS_CACHE_TTL = 60_000
+
+// Only the fields the modal renders
+const CONTACT_COLUMNS = 'id, nome, cpf, telefones, status, notes, scheduled_for'
+const CASO_COLUMNS = 'id, nome, cpf, data_obito, idade, cidade, estado, profissao, link_fonte'
+// Every relative of the deceased, embedded in the caso so no extra round-trip is needed
+const RELATIVES_EMBED = 'relacionamentos(tipo_parentesco, contatos(id, nome, cpf, telefones, status))'
+const MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+async function loadContactDetails(contactId: string): Promise<ContactDetails | null> {
+  // Contact info and its deceased (via relacionamentos) only depend on the
+  // contact id, so fetch them in parallel
+  const [{ data: contactData, error }, { data: relData, error: relError }] = await Promise.all([
+    supabase
+      .from('contatos')
+      .select(CONTACT_COLUMNS)
+      .eq('id', contactId)
+      .single(),
+    // Same relationship v_pipeline_cards picks for the card
+    (supabase
+      .from('relacionamentos') as any)
+      .select(`tipo_parentesco, casos(${CASO_COLUMNS}, ${RELATIVES_EMBED})`)
+      .eq('contato_id', contactId)
+      .order('id')
+      .limit(1)
+      .maybeSingle(),
+  ])
+
+  if (error) throw error
+  // Throw rather than cache a contact that looks like it has no caso
+  if (relError) throw relError
+
+  const contact = contactData as Contato | null
+  if (!contact) return null
+
+  const { relacionamentos: allRels, ...caso } = relData?.casos || {}
+  const parentesco = relData?.tipo_parentesco || null
+
+  // OTHER relatives of the same deceased
+  const otherRelatives: RelativeInfo[] = (allRels || []).map((rel: any) => ({
+    contato_id: rel.contatos?.id,
+    nome: rel.contatos?.nome,
+    cpf: rel.contatos?.cpf,
+    telefone: rel.contatos?.telefones?.[0] || null,
+    tipo_parentesco: rel.tipo_parentesco,
+    status: rel.contatos?.status
+  })).filter((r: RelativeInfo) => r.contato_id && r.contato_id !== contactId)
+
+  return {
+    contact,
+    caso: relData?.casos ? caso : null,
+    parentesco,
+    otherRelatives
+  }
+}
+
+// Warm the details cache before the modal opens (e.g. on card hover)
+export function prefetchContactDetails(contactId: string) {
+  cached(`contact:${contactId}`, DETAILS_CACHE_TTL, () => loadContactDetails(contactId))
+    .catch(() => {})
+}
+
+export function ContactDetailModal({ contactId, preview, isOpen, onClose, onUpdate }: ContactDetailProps) {
   const [details, setDetails] = useState<ContactDetails | null>(null)
   const [loading, setLoading] = useState(false)
   const [notes, setNotes] = useState('')
+  // Last saved notes; only replaced on load of another contact or after a save
+  const [originalNotes, setOriginalNotes] = useState('')
   const [saving, setSaving] = useState(false)
   const [scheduledFor, setScheduledFor] = useState('')
   const [originalScheduledFor, setOriginalScheduledFor] = useState('')
@@ -44,62 +113,26 @@ export function ContactDetailModal({ contactId, isOpen, onClose, onUpdate }: Con
     setLoading(true)
 
     try {
-      // Fetch contact info
-      const { data: contactData } = await supabase
-        .from('contatos')
-        .select('*')
-        .eq('id', contactId)
-        .single()
-
-      const contact = contactData as Contato | null
+      const loaded = await cached(`contact:${contactId}`, DETAILS_CACHE_TTL, () => loadContactDetails(contactId))
 
-      if (!contact) {
+      if (!loaded) {
         setLoading(false)
         return
       }
 
-      setNotes(contact.notes || '')
+      const { contact } = loaded
+      const savedNotes = contact.notes || ''
+      // A refetch of the same contact (e.g. after a status change) must not
+      // discard notes that are being edited but not saved yet
+      const isSameContact = details?.contact.id === contact.id
+      setNotes(prev => (isSameContact && prev !== originalNotes ? prev : savedNotes))
+      setOriginalNotes(savedNotes)
       const schedDate = contact.scheduled_for ? contact.scheduled_for.split('T')[0] : ''
       setScheduledFor(schedDate)
       setOriginalScheduledFor(schedDate)
       setPendingStatus(null)
 
-      // Fetch related caso via relacionamentos
-      const { data: relData } = await (supabase
-        .from('relacionamentos') as any)
-        .select('tipo_parentesco, caso_id, casos(*)')
-        .eq('contato_id', contactId)
-        .single()
-
-      const caso = relData?.casos || null
-      const parentesco = relData?.tipo_parentesco || null
-      const casoId = relData?.caso_id
-
-      // Fetch OTHER relatives of the same deceased
-      let otherRelatives: RelativeInfo[] = []
-      if (casoId) {
-        const { data: otherRels } = await (supabase
-          .from('relacionamentos') as any)
-          .select('tipo_parentesco, contatos(id, nome, cpf, telefone_1, status)')
-          .eq('caso_id', casoId)
-          .neq('contato_id', contactId)
-
-        otherRelatives = (otherRels || []).map((rel: any) => ({
-          contato_id: rel.contatos?.id,
-          nome: rel.contatos?.nome,
-          cpf: rel.contatos?.cpf,
-          telefone_1: rel.contatos?.telefone_1,
-          tipo_parentesco: rel.tipo_parentesco,
-          status: rel.contatos?.status
-        })).filter((r: RelativeInfo) => r.contato_id)
-      }
-
-      setDetails({
-        contact,
-        caso,
-        parentesco,
-        otherRelatives
-      })
+      setDetails(loaded)
     } catch (err) {
       console.error('Error fetching contact details:', err)
     } finally {
@@ -126,7 +159,7 @@ export function ContactDetailModal({ contactId, isOpen, onClose, onUpdate }: Con
   }
 
   const updateScheduledDate = async () => {
-    if (!contactId || !scheduledFor) return
+    if (!contactId || !scheduledFor || scheduledFor === originalScheduledFor) return
     setSaving(true)
 
     try {
@@ -136,6 +169,7 @@ export function ContactDetailModal({ contactId, isOpen, onClose, onUpdate }: Con
         .eq('id', contactId)
 
       setOriginalScheduledFor(scheduledFor)
+      invalidateCache()
       onUpdate()
       fetchContactDetails()
     } catch (err) {
@@ -150,52 +184,33 @@ export function ContactDetailModal({ contactId, isOpen, onClose, onUpdate }: Con
     setSaving(true)
 
     try {
-      // Update the contact status
-      const updateData: { status: string; status_updated_at: string; scheduled_for?: string | null } = { 
-        status: newStatus, 
-        status_updated_at: new Date().toISOString() 
-      }
-      
-      if (newStatus === 'Scheduled' && scheduleDate) {
-        updateData.scheduled_for = scheduleDate
-      } else if (newStatus !== 'Scheduled') {
-        updateData.scheduled_for = null
-      }
-      
-      await (supabase
-        .from('contatos') as any)
-        .update(updateData)
-        .eq('id', contactId)
-
-      // If Won, trigger the One-Win-Close-All logic
-      if (newStatus === 'Won' && details.caso?.id) {
-        const { data: allRels } = await (supabase
-          .from('relacionamentos') as any)
-          .select('contato_id')
-          .eq('caso_id', details.caso.id)
-          .neq('contato_id', contactId)
-
-        // Close all other relatives
-        for (const rel of allRels || []) {
-          const { data: otherContact } = await (supabase
-            .from('contatos') as any)
-            .select('status, notes')
-            .eq('id', rel.contato_id)
-            .single()
-
-          if (otherContact && !['Won', 'Lost'].includes(otherContact.status || '')) {
-            await (supabase
-              .from('contatos') as any)
-              .update({
-                status: 'Lost',
-                notes: (otherContact.notes || '') + `\n[Auto-fechado: Outro familiar ganhou em ${new Date().toLocaleDateString('pt-BR')}]`,
-                status_updated_at: new Date().toISOString()
-              })
-              .eq('id', rel.contato_id)
-          }
+      if (newStatus === 'Won') {
+        // Mark as Won and run One-Win-Close-All in a single transaction
+        // (see migrations/004_mark_won_close_all.sql)
+        const { error } = await (supabase as any)
+          .rpc('mark_won_close_all', { winner_id: contactId })
+
+        if (error) throw error
+      } else {
+        // Update the contact status (status_updated_at is set by a trigger,
+        // see migrations/012_touch_status_timestamp.sql)
+        const updateData: { status: string; scheduled_for?: string | null } = { 
+          status: newStatus
+        }
+        
+        if (newStatus === 'Scheduled' && scheduleDate) {
+          updateData.scheduled_for = scheduleDate
+        } else if (newStatus !== 'Scheduled') {
+          updateData.scheduled_for = null
         }
+        
+        await (supabase
+          .from('contatos') as any)
+          .update(updateData)
+          .eq('id', contactId)
       }
 
+      invalidateCache()
       onUpdate()
       fetchContactDetails()
     } catch (err) {
@@ -205,17 +220,24 @@ export function ContactDetailModal({ contactId, isOpen, onClose, onUpdate }: Con
     }
   }
 
+  const notesChanged = notes !== originalNotes
+
   const saveNotes = async () => {
-    if (!contactId) return
+    // Nothing to write if the notes still match the last saved value
+    if (!contactId || !notesChanged) return
     setSaving(true)
 
     try {
-      await (supabase
+      const { error } = await (supabase
         .from('contatos') as any)
         .update({ notes })
         .eq('id', contactId)
 
-      onUpdate()
+      if (error) throw error
+
+      setOriginalNotes(notes)
+      // Notes are not shown on the cards, so the board does not need a refetch
+      invalidateCache()
     } catch (err) {
       console.error('Error saving notes:', err)
     } finally {
@@ -225,13 +247,22 @@ export function ContactDetailModal({ contactId, isOpen, onClose, onUpdate }: Con
 
   const handleFileUpload = async (e: React.ChangeEvent<HTMLInputElement>) => {
     const file = e.target.files?.[0]
+    // Reset so selecting the same file again still fires onChange
+    e.target.value = ''
     if (!file || !details?.caso?.id) return
 
+    // Reject before sending any bytes rather than after a full upload
+    if (file.size > MAX_UPLOAD_BYTES) {
+      alert('Arquivo muito grande (máx. 10MB)')
+      return
+    }
+
     try {
       const fileName = `${details.caso.id}/${Date.now()}_${file.name}`
+      // The File is passed as-is so the browser streams it from disk
       const { error } = await supabase.storage
         .from('case_files')
-        .upload(fileName, file)
+        .upload(fileName, file, { contentType: file.type || undefined })
 
       if (error) throw error
       alert('Arquivo enviado com sucesso!')
@@ -247,14 +278,7 @@ export function ContactDetailModal({ contactId, isOpen, onClose, onUpdate }: Con
   const caso = details?.caso
   const currentStatus = contact?.status || 'New'
 
-  const statusBadgeVariant = {
-    'New': 'new',
-    'Attempted': 'attempted',
-    'In Progress': 'inProgress',
-    'Scheduled': 'scheduled',
-    'Won': 'won',
-    'Lost': 'lost'
-  }[currentStatus] || 'default'
+  const statusBadgeVariant = STAGE_BADGE_VARIANT[currentStatus] || 'default'
 
   return (
     <Dialog open={isOpen} onOpenChange={onClose}>
@@ -262,7 +286,9 @@ export function ContactDetailModal({ contactId, isOpen, onClose, onUpdate }: Con
         <DialogHeader>
           <DialogTitle className="flex items-center gap-3">
             <User className="h-6 w-6" />
-            {loading ? 'Carregando...' : contact?.nome || 'Detalhes do Contato'}
+            {loading
+              ? preview?.contato_nome || 'Carregando...'
+              : contact?.nome || 'Detalhes do Contato'}
           </DialogTitle>
         </DialogHeader>
 
@@ -391,14 +417,12 @@ export function ContactDetailModal({ contactId, isOpen, onClose, onUpdate }: Con
                   <div>
                     <p className="text-sm text-gray-500">Telefones</p>
                     <div className="space-y-1">
-                      {[contact?.telefone_1, contact?.telefone_2, contact?.telefone_3, contact?.telefone_4]
-                        .filter(Boolean)
-                        .map((phone, i) => (
-                          <p key={i} className="font-medium font-mono">
-                            {formatPhone(phone ?? null)}
-                          </p>
-                        ))}
-                      {![contact?.telefone_1, contact?.telefone_2, contact?.telefone_3, contact?.telefone_4].some(Boolean) && (
+                      {(contact?.telefones || []).map((phone, i) => (
+                        <p key={i} className="font-medium font-mono">
+                          {formatPhone(phone)}
+                        </p>
+                      ))}
+                      {!contact?.telefones?.length && (
                         <p className="text-gray-400">Nenhum telefone cadastrado</p>
                       )}
                     </div>
@@ -427,7 +451,7 @@ export function ContactDetailModal({ contactId, isOpen, onClose, onUpdate }: Con
                     placeholder="Adicione notas sobre o contato..."
                     rows={4}
                   />
-                  <Button onClick={saveNotes} disabled={saving} className="w-full">
+                  <Button onClick={saveNotes} disabled={saving || !notesChanged} className="w-full">
                     {saving ? 'Salvando...' : 'Salvar Notas'}
                   </Button>
                 </CardContent>
@@ -517,21 +541,13 @@ export function ContactDetailModal({ contactId, isOpen, onClose, onUpdate }: Con
                             <p className="text-xs text-gray-500">
                               {rel.tipo_parentesco || 'Parentesco não informado'}
                             </p>
-                            {rel.telefone_1 && (
+                            {rel.telefone && (
                               <p className="text-xs text-gray-400 font-mono">
-                                {formatPhone(rel.telefone_1)}
+                                {formatPhone(rel.telefone)}
                               </p>
                             )}
                           </div>
-                          <Badge variant={
-                            {
-                              'New': 'new',
-                              'Attempted': 'attempted',
-                              'In Progress': 'inProgress',
-                              'Won': 'won',
-                              'Lost': 'lost'
-                            }[rel.status || 'New'] as any
-                          }>
+                          <Badge variant={STAGE_BADGE_VARIANT[rel.status || 'New'] as any}>
                             {rel.status || 'New'}
                           </Badge>
                         </div>
@@ -3,9 +3,17 @@
 import { useEffect, useState } from 'react'
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card'
 import { Users, UserCheck, Clock, Trophy, XCircle, TrendingUp, MapPin, Building } from 'lucide-react'
-import { supabase, PIPELINE_STAGES, STAGE_CONFIG } from '@/lib/supabase'
+import { supabase, fetchStageCounts, PIPELINE_STAGES, STAGE_CONFIG } from '@/lib/supabase'
 import type { DashboardStats } from '@/lib/types'
 
+const STATUS_ICONS: Record<string, any> = {
+  'New': Users,
+  'Attempted': Clock,
+  'In Progress': TrendingUp,
+  'Won': Trophy,
+  'Lost': XCircle
+}
+
 export function Dashboard() {
   const [stats, setStats] = useState<DashboardStats>({
     totalCasos: 0,
@@ -23,73 +31,50 @@ export function Dashboard() {
 
   const fetchStats = async () => {
     try {
-      // Total casos
-      const { count: casosCount } = await (supabase
-        .from('casos') as any)
-        .select('*', { count: 'exact', head: true })
+      const weekAgo = new Date()
+      weekAgo.setDate(weekAgo.getDate() - 7)
 
-      // Total contatos
-      const { count: contatosCount } = await (supabase
-        .from('contatos') as any)
-        .select('*', { count: 'exact', head: true })
+      // The queries are independent, so issue them all at once
+      const [
+        { count: casosCount },
+        byStatus,
+        { data: cityData },
+        { data: stateData },
+        { count: recentCount },
+      ] = await Promise.all([
+        // Total casos (planner estimate for large tables, no full scan)
+        (supabase
+          .from('casos') as any)
+          .select('id', { count: 'estimated', head: true }),
 
-      // Counts by status
-      const byStatus: Record<string, number> = {}
-      for (const stage of PIPELINE_STAGES) {
-        const { count } = await (supabase
-          .from('contatos') as any)
-          .select('*', { count: 'exact', head: true })
-          .eq('status', stage)
-        byStatus[stage] = count || 0
-      }
+        // Counts by status (their sum is the exact contatos total)
+        fetchStageCounts(),
 
-      // Top cities
-      const { data: cityData } = await (supabase
-        .from('casos') as any)
-        .select('cidade')
-        .not('cidade', 'is', null)
-        .limit(1000)
+        // Top cities (see migrations/011_location_counts.sql)
+        (supabase as any).rpc('get_top_cities', { p_limit: 10 }),
 
-      const cityCounts: Record<string, number> = {}
-      cityData?.forEach((c: any) => {
-        if (c.cidade) {
-          cityCounts[c.cidade] = (cityCounts[c.cidade] || 0) + 1
-        }
-      })
-      const byCity = Object.entries(cityCounts)
-        .sort((a, b) => b[1] - a[1])
-        .slice(0, 10)
-        .map(([city, count]) => ({ city, count }))
+        // Top states
+        (supabase as any).rpc('get_top_states', { p_limit: 10 }),
 
-      // Top states
-      const { data: stateData } = await (supabase
-        .from('casos') as any)
-        .select('estado')
-        .not('estado', 'is', null)
-        .limit(1000)
+        // Recent activity (last 7 days)
+        (supabase
+          .from('contatos') as any)
+          .select('id', { count: 'exact', head: true })
+          .gte('status_updated_at', weekAgo.toISOString()),
+      ])
 
-      const stateCounts: Record<string, number> = {}
-      stateData?.forEach((s: any) => {
-        if (s.estado) {
-          stateCounts[s.estado] = (stateCounts[s.estado] || 0) + 1
-        }
-      })
-      const byState = Object.entries(stateCounts)
-        .sort((a, b) => b[1] - a[1])
-        .slice(0, 10)
-        .map(([state, count]) => ({ state, count }))
+      const byCity = ((cityData || []) as { city: string; count: number }[])
+        .map(({ city, count }) => ({ city, count: Number(count) }))
+      const byState = ((stateData || []) as { state: string; count: number }[])
+        .map(({ state, count }) => ({ state, count: Number(count) }))
 
-      // Recent activity (last 7 days)
-      const weekAgo = new Date()
-      weekAgo.setDate(weekAgo.getDate() - 7)
-      const { count: recentCount } = await (supabase
-        .from('contatos') as any)
-        .select('*', { count: 'exact', head: true })
-        .gte('status_updated_at', weekAgo.toISOString())
+      // Exact total from the same counters as the per-stage numbers, so the
+      // conversion rate and stage percentages always add up
+      const totalContatos = Object.values(byStatus).reduce((sum, n) => sum + n, 0)
 
       setStats({
         totalCasos: casosCount || 0,
-        totalContatos: contatosCount || 0,
+        totalContatos,
         byStatus,
         byCity,
         byState,
@@ -102,14 +87,6 @@ export function Dashboard() {
     }
   }
 
-  const statusIcons: Record<string, any> = {
-    'New': Users,
-    'Attempted': Clock,
-    'In Progress': TrendingUp,
-    'Won': Trophy,
-    'Lost': XCircle
-  }
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -176,7 +153,7 @@ export function Dashboard() {
         <h3 className="text-lg font-semibold mb-4">Pipeline por Status</h3>
         <div className="grid grid-cols-2 md:grid-cols-5 gap-4">
           {PIPELINE_STAGES.map((stage) => {
-            const Icon = statusIcons[stage] || Users
+            const Icon = STATUS_ICONS[stage] || Users
             const config = STAGE_CONFIG[stage]
             const count = stats.byStatus[stage] || 0
             const percentage = stats.totalContatos > 0 
@@ -18,18 +18,18 @@ interface FiltersProps {
 
 export function FiltersPanel({ filters, onFiltersChange, estados, cidades }: FiltersProps) {
   const [isExpanded, setIsExpanded] = useState(true)
-  const [campaigns, setCampaigns] = useState<Campaign[]>([])
+  const [campaigns, setCampaigns] = useState<Pick<Campaign, 'id' | 'name'>[]>([])
 
   useEffect(() => {
     const fetchCampaigns = async () => {
       const { data } = await (supabase
         .from('campaigns') as any)
-        .select('*')
+        .select('id, name')
         .eq('status', 'active')
         .order('name')
       
       if (data) {
-        setCampaigns(data as Campaign[])
+        setCampaigns(data as Pick<Campaign, 'id' | 'name'>[])
       }
     }
     fetchCampaigns()
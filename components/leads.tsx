@@ -1,23 +1,26 @@
 "use client"
 
-import { useState, useEffect, useCallback } from 'react'
+import { useState, useEffect, useCallback, useRef } from 'react'
 import { Card, CardContent } from '@/components/ui/card'
 import { Button } from '@/components/ui/button'
 import { ContactCard } from './contact-card'
-import { ContactDetailModal } from './contact-detail'
+import { ContactDetailModal, prefetchContactDetails } from './contact-detail'
 import { FiltersPanel } from './filters'
-import { supabase } from '@/lib/supabase'
+import { supabase, applyCardFilters, fetchEstados, filtersKey, CARD_COLUMNS } from '@/lib/supabase'
+import { cached, invalidateCache } from '@/lib/cache'
 import type { ContactCard as ContactCardType, Filters } from '@/lib/types'
 import { ChevronDown, RefreshCw } from 'lucide-react'
 
 const CARDS_PER_LOAD = 20
+const CACHE_TTL = 30_000
+const COUNT_CACHE_TTL = 300_000
 
 export function Leads() {
   const [cards, setCards] = useState<ContactCardType[]>([])
   const [totalCount, setTotalCount] = useState(0)
-  const [loadedCount, setLoadedCount] = useState(CARDS_PER_LOAD)
+  const [hasMore, setHasMore] = useState(false)
   const [loading, setLoading] = useState(false)
-  const [selectedContactId, setSelectedContactId] = useState<string | null>(null)
+  const [selectedCard, setSelectedCard] = useState<ContactCardType | null>(null)
   const [isDetailOpen, setIsDetailOpen] = useState(false)
   const [refreshKey, setRefreshKey] = useState(0)
 
@@ -39,155 +42,102 @@ export function Leads() {
 
   // Fetch filter options
   useEffect(() => {
-    const fetchFilterOptions = async () => {
-      const { data: estadoData } = await (supabase
-        .from('casos') as any)
-        .select('estado')
-        .not('estado', 'is', null)
-
-      const uniqueEstados = Array.from(new Set(estadoData?.map((e: any) => e.estado).filter(Boolean)))
-      setEstados(uniqueEstados.sort() as string[])
-    }
-    fetchFilterOptions()
+    fetchEstados()
+      .then(setEstados)
+      .catch(err => console.error('Error fetching estados:', err))
   }, [])
 
-  // Fetch cards
-  const fetchCards = useCallback(async (limit: number) => {
-    setLoading(true)
-
-    try {
-      // Check if we have any case-related filters
-      const hasCaseFilters = filters.caseName || filters.caseCpf || filters.cidade || filters.estado || filters.dateFrom || filters.dateTo
-      const caseModifier = hasCaseFilters ? '!inner' : ''
-      const campaignJoin = filters.campaignId ? ', campaign_leads!inner(campaign_id)' : ''
-
-      let query = (supabase
-        .from('relacionamentos') as any)
-        .select(`
-          id, tipo_parentesco, caso_id,
-          contatos!inner(id, nome, cpf, telefone_1, telefone_2, telefone_3, telefone_4, status, notes, scheduled_for${campaignJoin}),
-          casos${caseModifier}(id, nome, cpf, cidade, estado, data_obito)
-        `)
-        .limit(limit)
-
-      // Apply filters
-      if (filters.campaignId) {
-        query = query.eq('contatos.campaign_leads.campaign_id', filters.campaignId)
-      }
-      if (filters.contactName) {
-        query = query.ilike('contatos.nome', `%${filters.contactName}%`)
-      }
-      if (filters.contactCpf) {
-        query = query.ilike('contatos.cpf', `%${filters.contactCpf}%`)
-      }
-      if (filters.caseName) {
-        query = query.ilike('casos.nome', `%${filters.caseName}%`)
-      }
-      if (filters.caseCpf) {
-        query = query.ilike('casos.cpf', `%${filters.caseCpf}%`)
-      }
-      if (filters.cidade) {
-        query = query.ilike('casos.cidade', `%${filters.cidade}%`)
-      }
-      if (filters.estado) {
-        query = query.eq('casos.estado', filters.estado)
-      }
-      if (filters.dateFrom) {
-        query = query.gte('casos.data_obito', filters.dateFrom)
-      }
-      if (filters.dateTo) {
-        query = query.lte('casos.data_obito', filters.dateTo)
-      }
-      if (filters.status && filters.status !== 'ALL') {
-        query = query.eq('contatos.status', filters.status)
-      }
-
-      const { data, error } = await query
+  // Read by the refresh effect to reload as many pages as are shown
+  const cardsRef = useRef(cards)
+  cardsRef.current = cards
+  const lastFiltersRef = useRef(filters)
+  // Bumped by every full reload; responses from an older generation (e.g. a
+  // "Carregar mais" that was in flight when the filters changed) are dropped
+  const generationRef = useRef(0)
+
+  const buildQuery = useCallback((columns: string, options?: { count: 'estimated'; head: true }) => {
+    // v_pipeline_cards already returns one row per contact
+    const campaignJoin = filters.campaignId ? ', campaign_leads!inner(campaign_id)' : ''
+    let query = (supabase
+      .from('v_pipeline_cards') as any)
+      .select(`${columns}${campaignJoin}`, options)
+
+    query = applyCardFilters(query, filters)
+    if (filters.status && filters.status !== 'ALL') {
+      query = query.eq('status', filters.status)
+    }
+    return query
+  }, [filters])
 
+  // Each page is cached by its offset, so "Carregar mais" only downloads
+  // the new rows and a reload reuses the pages it already has
+  const fetchPage = useCallback((offset: number) => {
+    return cached(`leads:${offset}:${filtersKey(filters)}`, CACHE_TTL, async () => {
+      const { data, error } = await buildQuery(CARD_COLUMNS)
+        .order('contato_id')
+        .range(offset, offset + CARDS_PER_LOAD - 1)
       if (error) throw error
+      return (data || []) as ContactCardType[]
+    })
+  }, [filters, buildQuery])
 
-      const newCards: ContactCardType[] = []
-      const seenIds = new Set<string>()
-
-      for (const rel of (data as any[]) || []) {
-        const contato = rel.contatos
-        const caso = rel.casos
-
-        if (!contato || seenIds.has(contato.id)) continue
-        seenIds.add(contato.id)
-
-        const phones = [contato.telefone_1, contato.telefone_2, contato.telefone_3, contato.telefone_4]
-          .filter(Boolean)
-
-        newCards.push({
-          contato_id: contato.id,
-          contato_nome: contato.nome || 'Sem nome',
-          contato_cpf: contato.cpf,
-          phone_display: phones[0] || '',
-          all_phones: phones,
-          status: contato.status || 'New',
-          notes: contato.notes,
-          caso_id: caso?.id || null,
-          caso_nome: caso?.nome || 'Desconhecido',
-          caso_cpf: caso?.cpf,
-          caso_cidade: caso?.cidade,
-          caso_estado: caso?.estado,
-          caso_data_obito: caso?.data_obito?.split('T')[0] || null,
-          tipo_parentesco: rel.tipo_parentesco,
-          scheduled_for: contato.scheduled_for || null
-        })
-      }
+  // Reload from the first page; a refresh with unchanged filters keeps as
+  // many pages as were loaded
+  useEffect(() => {
+    const keepLoaded = lastFiltersRef.current === filters
+    lastFiltersRef.current = filters
+    const generation = ++generationRef.current
+    const pageCount = keepLoaded
+      ? Math.max(1, Math.ceil(cardsRef.current.length / CARDS_PER_LOAD))
+      : 1
 
-      setCards(newCards)
-      
-      // We need a separate count query because the main query limits results
-      let countQuery = supabase
-        .from('contatos')
-        .select('*', { count: 'exact', head: true })
-      
-      // Apply same filters to count... this is tricky because of the joins. 
-      // For simplicity in this iteration, we might just count the loaded vs total in a simpler way or rely on the query above if we weren't limiting.
-      // Actually, Supabase returns count if we ask for it, but with limit it returns the total matching count if we use { count: 'exact' }
-      
-      // Let's re-run the query with count='exact' but we need to respect the limit for data
-      // The previous query call didn't include count param correctly in the select builder chain for count + data
-      
-      // Correct approach:
-      // We can't easily get total count with complex joins and filters in one go without a separate query usually, 
-      // but let's try to trust the user will scroll.
-      // For now, let's just use the length of data to decide if we show load more? No, that's not enough.
-      
-      // Let's fetch count separately with same filters
-      // This is complicated because the filters are on joined tables.
-      // Simplified: Just use a large limit or accept that "Load More" shows up until we get less than limit.
-      
-      if (data.length < limit) {
-         setTotalCount(data.length)
-      } else {
-         setTotalCount(limit + 1) // Hack to show load more
-      }
+    setLoading(true)
+    Promise.all([
+      Promise.all(Array.from({ length: pageCount }, (_, i) => fetchPage(i * CARDS_PER_LOAD))),
+      // The total only depends on the filters, so "Load more" reuses it.
+      // 'estimated' is exact for small results and a planner estimate for
+      // large ones, so it is only used for display.
+      cached(`leads-count:${filtersKey(filters)}`, COUNT_CACHE_TTL, async () => {
+        const { count, error } = await buildQuery('contato_id', { count: 'estimated', head: true })
+        if (error) throw error
+        return (count || 0) as number
+      }),
+    ])
+      .then(([pages, count]) => {
+        if (generation !== generationRef.current) return
+        setCards(pages.flat())
+        setHasMore(pages[pages.length - 1].length === CARDS_PER_LOAD)
+        setTotalCount(count)
+      })
+      .catch(err => console.error('Error fetching leads:', err))
+      .finally(() => {
+        if (generation === generationRef.current) setLoading(false)
+      })
+  }, [filters, refreshKey, fetchPage, buildQuery])
+
+  const loadMore = async () => {
+    const generation = generationRef.current
+    setLoading(true)
 
+    try {
+      const page = await fetchPage(cards.length)
+      if (generation !== generationRef.current) return
+      setCards(prev => [...prev, ...page])
+      setHasMore(page.length === CARDS_PER_LOAD)
     } catch (err) {
       console.error('Error fetching leads:', err)
     } finally {
-      setLoading(false)
+      if (generation === generationRef.current) setLoading(false)
     }
-  }, [filters])
-
-  useEffect(() => {
-    fetchCards(loadedCount)
-  }, [filters, refreshKey, loadedCount, fetchCards])
-
-  const loadMore = () => {
-    setLoadedCount(prev => prev + CARDS_PER_LOAD)
   }
 
-  const handleCardClick = (contactId: string) => {
-    setSelectedContactId(contactId)
+  const handleCardClick = useCallback((card: ContactCardType) => {
+    setSelectedCard(card)
     setIsDetailOpen(true)
-  }
+  }, [])
 
   const handleRefresh = () => {
+    invalidateCache()
     setRefreshKey(prev => prev + 1)
   }
 
@@ -207,7 +157,14 @@ export function Leads() {
 
       {/* Refresh Button */}
       <div className="flex justify-between items-center">
-        <h2 className="text-lg font-semibold text-gray-700">Todos os Leads</h2>
+        <h2 className="text-lg font-semibold text-gray-700">
+          Todos os Leads
+          {totalCount > 0 && (
+            <span className="ml-2 text-sm font-normal text-gray-500">
+              (~{totalCount.toLocaleString('pt-BR')})
+            </span>
+          )}
+        </h2>
         <Button variant="outline" size="sm" onClick={handleRefresh}>
           <RefreshCw className="h-4 w-4 mr-2" />
           Atualizar
@@ -229,14 +186,15 @@ export function Leads() {
             <ContactCard
               key={card.contato_id}
               contact={card}
-              onClick={() => handleCardClick(card.contato_id)}
+              onClick={handleCardClick}
+              onPrefetch={prefetchContactDetails}
             />
           ))
         )}
       </div>
 
-      {/* Load More */}
-      {cards.length >= loadedCount && (
+      {/* Load More - a full page means there may be more rows */}
+      {hasMore && (
         <div className="flex justify-center pt-4">
           <Button
             variant="ghost"
@@ -257,7 +215,8 @@ export function Leads() {
 
       {/* Contact Detail Modal */}
       <ContactDetailModal
-        contactId={selectedContactId}
+        contactId={selectedCard?.contato_id ?? null}
+        preview={selectedCard}
         isOpen={isDetailOpen}
         onClose={() => setIsDetailOpen(false)}
         onUpdate={handleDetailUpdate}
@@ -1,23 +1,38 @@
 "use client"
 
-import { useState, useEffect, useCallback } from 'react'
+import { useState, useEffect, useCallback, useRef, memo } from 'react'
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card'
 import { Button } from '@/components/ui/button'
 import { ContactCard } from './contact-card'
-import { ContactDetailModal } from './contact-detail'
+import { ContactDetailModal, prefetchContactDetails } from './contact-detail'
 import { FiltersPanel } from './filters'
-import { supabase, PIPELINE_STAGES, STAGE_CONFIG, type PipelineStage } from '@/lib/supabase'
+import { supabase, applyCardFilters, fetchStageCounts, fetchEstados, filtersKey, CARD_COLUMNS, VISIBLE_STAGES, STAGE_CONFIG, type PipelineStage } from '@/lib/supabase'
+import { cached, invalidateCache } from '@/lib/cache'
 import type { ContactCard as ContactCardType, Filters } from '@/lib/types'
 import { ChevronDown, RefreshCw } from 'lucide-react'
 
 const CARDS_PER_LOAD = 15
+const CACHE_TTL = 30_000
+const COUNTS_REFRESH_MS = 30_000
+const EMPTY_CARDS: ContactCardType[] = []
+
+// Position of the last loaded card in (status_updated_at DESC, contato_id DESC) order
+type StageCursor = { updatedAt: string | null; id: string }
+
+// PostgREST `or` filter selecting the cards that come after `cursor`
+function afterCursor(cursor: StageCursor) {
+  if (cursor.updatedAt === null) {
+    return `and(status_updated_at.is.null,contato_id.lt.${cursor.id})`
+  }
+  const ts = `"${cursor.updatedAt}"`
+  return `status_updated_at.lt.${ts},status_updated_at.is.null,and(status_updated_at.eq.${ts},contato_id.lt.${cursor.id})`
+}
 
 export function Pipeline() {
   const [cardsByStage, setCardsByStage] = useState<Record<string, ContactCardType[]>>({})
   const [countsByStage, setCountsByStage] = useState<Record<string, number>>({})
-  const [loadedByStage, setLoadedByStage] = useState<Record<string, number>>({})
   const [loadingStages, setLoadingStages] = useState<Record<string, boolean>>({})
-  const [selectedContactId, setSelectedContactId] = useState<string | null>(null)
+  const [selectedCard, setSelectedCard] = useState<ContactCardType | null>(null)
   const [isDetailOpen, setIsDetailOpen] = useState(false)
   const [refreshKey, setRefreshKey] = useState(0)
 
@@ -36,160 +51,115 @@ export function Pipeline() {
 
   const [estados, setEstados] = useState<string[]>([])
   const [cidades, setCidades] = useState<string[]>([])
-  
-  // Filter out 'New' from displayed stages
-  const VISIBLE_STAGES = PIPELINE_STAGES.filter(stage => stage !== 'New')
-
-  // Initialize loaded counts
-  useEffect(() => {
-    const initial: Record<string, number> = {}
-    VISIBLE_STAGES.forEach(stage => {
-      initial[stage] = CARDS_PER_LOAD
-    })
-    setLoadedByStage(initial)
-  }, [])
 
   // Fetch filter options
   useEffect(() => {
-    const fetchFilterOptions = async () => {
-      // Fetch unique estados
-      const { data: estadoData } = await (supabase
-        .from('casos') as any)
-        .select('estado')
-        .not('estado', 'is', null)
-
-      const uniqueEstados = Array.from(new Set(estadoData?.map((e: any) => e.estado).filter(Boolean)))
-      setEstados(uniqueEstados.sort() as string[])
-    }
-    fetchFilterOptions()
+    fetchEstados()
+      .then(setEstados)
+      .catch(err => console.error('Error fetching estados:', err))
   }, [])
   
-  // Fetch cards for each stage
-  const fetchStageCards = useCallback(async (stage: PipelineStage, limit: number) => {
+  // Read by the refresh effect to reload as many cards as each column shows
+  const cardsByStageRef = useRef(cardsByStage)
+  cardsByStageRef.current = cardsByStage
+  const lastFiltersRef = useRef(filters)
+  // Bumped by every full reload; responses from an older generation (e.g. a
+  // "Carregar mais" that was in flight when the filters changed) are dropped
+  const generationRef = useRef(0)
+
+  // Fetch a page of cards for a stage; with a cursor the page is appended
+  const fetchStageCards = useCallback(async (
+    stage: PipelineStage,
+    cursor: StageCursor | null = null,
+    limit: number = CARDS_PER_LOAD
+  ) => {
+    const generation = generationRef.current
     setLoadingStages(prev => ({ ...prev, [stage]: true }))
 
     try {
-      // Check if we have any case-related filters
-      const hasCaseFilters = filters.caseName || filters.caseCpf || filters.cidade || filters.estado || filters.dateFrom || filters.dateTo
-      const caseModifier = hasCaseFilters ? '!inner' : ''
-      const campaignJoin = filters.campaignId ? ', campaign_leads!inner(campaign_id)' : ''
-
-      let query = (supabase
-        .from('relacionamentos') as any)
-        .select(`
-          id, tipo_parentesco, caso_id,
-          contatos!inner(id, nome, cpf, telefone_1, telefone_2, telefone_3, telefone_4, status, notes, scheduled_for${campaignJoin}),
-          casos${caseModifier}(id, nome, cpf, cidade, estado, data_obito)
-        `)
-        .eq('contatos.status', stage)
-        .limit(limit)
-
-      // Apply filters
-      if (filters.campaignId) {
-        query = query.eq('contatos.campaign_leads.campaign_id', filters.campaignId)
-      }
-      if (filters.contactName) {
-        query = query.ilike('contatos.nome', `%${filters.contactName}%`)
-      }
-      if (filters.contactCpf) {
-        query = query.ilike('contatos.cpf', `%${filters.contactCpf}%`)
-      }
-      if (filters.caseName) {
-        query = query.ilike('casos.nome', `%${filters.caseName}%`)
-      }
-      if (filters.caseCpf) {
-        query = query.ilike('casos.cpf', `%${filters.caseCpf}%`)
-      }
-      if (filters.cidade) {
-        query = query.ilike('casos.cidade', `%${filters.cidade}%`)
-      }
-      if (filters.estado) {
-        query = query.eq('casos.estado', filters.estado)
-      }
-      if (filters.dateFrom) {
-        query = query.gte('casos.data_obito', filters.dateFrom)
-      }
-      if (filters.dateTo) {
-        query = query.lte('casos.data_obito', filters.dateTo)
-      }
+      const filterKey = filtersKey(filters)
+      const cursorKey = cursor ? `${cursor.updatedAt}:${cursor.id}` : ''
+      const cards = await cached(`pipeline:${stage}:${cursorKey}:${limit}:${filterKey}`, CACHE_TTL, async () => {
+        const campaignJoin = filters.campaignId ? ', campaign_leads!inner(campaign_id)' : ''
 
-      const { data, error } = await query
-
-      if (error) throw error
-
-      const cards: ContactCardType[] = []
-      const seenIds = new Set<string>()
-
-      for (const rel of (data as any[]) || []) {
-        const contato = rel.contatos
-        const caso = rel.casos
-
-        if (!contato || seenIds.has(contato.id)) continue
-        seenIds.add(contato.id)
-
-        const phones = [contato.telefone_1, contato.telefone_2, contato.telefone_3, contato.telefone_4]
-          .filter(Boolean)
-
-        cards.push({
-          contato_id: contato.id,
-          contato_nome: contato.nome || 'Sem nome',
-          contato_cpf: contato.cpf,
-          phone_display: phones[0] || '',
-          all_phones: phones,
-          status: contato.status || 'New',
-          notes: contato.notes,
-          caso_id: caso?.id || null,
-          caso_nome: caso?.nome || 'Desconhecido',
-          caso_cpf: caso?.cpf,
-          caso_cidade: caso?.cidade,
-          caso_estado: caso?.estado,
-          caso_data_obito: caso?.data_obito?.split('T')[0] || null,
-          tipo_parentesco: rel.tipo_parentesco,
-          scheduled_for: contato.scheduled_for || null
-        })
-      }
+        let query = (supabase
+          .from('v_pipeline_cards') as any)
+          .select(`${CARD_COLUMNS}${campaignJoin}`)
+          .eq('status', stage)
+          .order('status_updated_at', { ascending: false, nullsFirst: false })
+          .order('contato_id', { ascending: false })
+          .limit(limit)
 
-      setCardsByStage(prev => ({ ...prev, [stage]: cards }))
+        if (cursor) {
+          query = query.or(afterCursor(cursor))
+        }
+        query = applyCardFilters(query, filters)
 
-      // Get total count for this stage
-      let countQuery = (supabase.from('contatos') as any)
-        .select(filters.campaignId ? '*, campaign_leads!inner(campaign_id)' : '*', { count: 'exact', head: true })
-        .eq('status', stage)
+        const { data, error } = await query
 
-      if (filters.campaignId) {
-        countQuery = countQuery.eq('campaign_leads.campaign_id', filters.campaignId)
-      }
+        if (error) throw error
 
-      const { count } = await countQuery
+        return (data || []) as ContactCardType[]
+      })
 
-      setCountsByStage(prev => ({ ...prev, [stage]: count || 0 }))
+      if (generation !== generationRef.current) return
 
+      setCardsByStage(prev => ({
+        ...prev,
+        [stage]: cursor ? [...(prev[stage] || []), ...cards] : cards
+      }))
     } catch (err) {
       console.error(`Error fetching ${stage} cards:`, err)
     } finally {
-      setLoadingStages(prev => ({ ...prev, [stage]: false }))
+      // The newer reload owns the loading flag
+      if (generation === generationRef.current) {
+        setLoadingStages(prev => ({ ...prev, [stage]: false }))
+      }
     }
   }, [filters])
 
-  // Fetch all stages on mount and when filters change
+  // Column header counts for all stages, in one request
+  const fetchCounts = useCallback(async (fresh: boolean = false) => {
+    try {
+      setCountsByStage(await fetchStageCounts(filters.campaignId, { fresh }))
+    } catch (err) {
+      console.error('Error fetching stage counts:', err)
+    }
+  }, [filters.campaignId])
+
+  // Fetch all stages on mount, when filters change and on refresh. A refresh
+  // (e.g. after a status change) reloads as many cards as each column already
+  // shows; new filters start every column over from the first page.
   useEffect(() => {
+    const keepLoaded = lastFiltersRef.current === filters
+    lastFiltersRef.current = filters
+    generationRef.current += 1
+
+    fetchCounts()
     VISIBLE_STAGES.forEach(stage => {
-      fetchStageCards(stage, loadedByStage[stage] || CARDS_PER_LOAD)
+      const loaded = keepLoaded ? (cardsByStageRef.current[stage]?.length || 0) : 0
+      fetchStageCards(stage, null, Math.max(loaded, CARDS_PER_LOAD))
     })
   }, [filters, refreshKey])
 
-  const loadMore = (stage: PipelineStage) => {
-    const newLimit = (loadedByStage[stage] || CARDS_PER_LOAD) + CARDS_PER_LOAD
-    setLoadedByStage(prev => ({ ...prev, [stage]: newLimit }))
-    fetchStageCards(stage, newLimit)
-  }
-
-  const handleCardClick = (contactId: string) => {
-    setSelectedContactId(contactId)
+  // Keep the header counts live while the board is open, without
+  // refetching the cards
+  useEffect(() => {
+    const interval = setInterval(() => {
+      // Bypass the cache: its TTL equals the interval, so a slightly early
+      // tick would otherwise be served the previous tick's counts
+      if (document.visibilityState === 'visible') fetchCounts(true)
+    }, COUNTS_REFRESH_MS)
+    return () => clearInterval(interval)
+  }, [fetchCounts])
+
+  const handleCardClick = useCallback((card: ContactCardType) => {
+    setSelectedCard(card)
     setIsDetailOpen(true)
-  }
+  }, [])
 
   const handleRefresh = () => {
+    invalidateCache()
     setRefreshKey(prev => prev + 1)
   }
 
@@ -218,81 +188,23 @@ export function Pipeline() {
 
       {/* Kanban Board */}
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4">
-        {VISIBLE_STAGES.map((stage) => {
-          const config = STAGE_CONFIG[stage]
-          const cards = cardsByStage[stage] || []
-          const totalCount = countsByStage[stage] || 0
-          const isLoading = loadingStages[stage]
-          const hasMore = cards.length < totalCount
-
-          return (
-            <div key={stage} className="flex flex-col">
-              {/* Column Header */}
-              <Card className={`${config.bgColor} border mb-3`}>
-                <CardHeader className="py-3 px-4">
-                  <CardTitle className={`text-sm font-semibold flex items-center justify-between ${config.color}`}>
-                    <span className="flex items-center gap-2">
-                      {config.icon} {stage}
-                    </span>
-                    <span className="bg-white rounded-full px-2 py-0.5 text-xs">
-                      {totalCount.toLocaleString('pt-BR')}
-                    </span>
-                  </CardTitle>
-                </CardHeader>
-              </Card>
-
-              {/* Cards */}
-              <div className="space-y-3 pipeline-column overflow-y-auto pr-1">
-                {isLoading && cards.length === 0 ? (
-                  <div className="flex justify-center py-8">
-                    <div className="animate-spin rounded-full h-6 w-6 border-b-2 border-gray-400" />
-                  </div>
-                ) : cards.length === 0 ? (
-                  <Card className="bg-gray-50">
-                    <CardContent className="py-8 text-center text-gray-400 text-sm">
-                      Nenhum contato
-                    </CardContent>
-                  </Card>
-                ) : (
-                  <>
-                    {cards.map((card) => (
-                      <ContactCard
-                        key={card.contato_id}
-                        contact={card}
-                        onClick={() => handleCardClick(card.contato_id)}
-                      />
-                    ))}
-
-                    {/* Load More Button */}
-                    {hasMore && (
-                      <Button
-                        variant="ghost"
-                        size="sm"
-                        className="w-full text-gray-500"
-                        onClick={() => loadMore(stage)}
-                        disabled={isLoading}
-                      >
-                        {isLoading ? (
-                          <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-gray-400" />
-                        ) : (
-                          <>
-                            <ChevronDown className="h-4 w-4 mr-1" />
-                            Carregar mais ({totalCount - cards.length})
-                          </>
-                        )}
-                      </Button>
-                    )}
-                  </>
-                )}
-              </div>
-            </div>
-          )
-        })}
+        {VISIBLE_STAGES.map((stage) => (
+          <PipelineColumn
+            key={stage}
+            stage={stage}
+            cards={cardsByStage[stage] || EMPTY_CARDS}
+            totalCount={countsByStage[stage] || 0}
+            isLoading={!!loadingStages[stage]}
+            onCardClick={handleCardClick}
+            onLoadMore={fetchStageCards}
+          />
+        ))}
       </div>
 
       {/* Contact Detail Modal */}
       <ContactDetailModal
-        contactId={selectedContactId}
+        contactId={selectedCard?.contato_id ?? null}
+        preview={selectedCard}
         isOpen={isDetailOpen}
         onClose={() => setIsDetailOpen(false)}
         onUpdate={handleDetailUpdate}
@@ -300,3 +212,91 @@ export function Pipeline() {
     </div>
   )
 }
+
+interface PipelineColumnProps {
+  stage: PipelineStage
+  cards: ContactCardType[]
+  totalCount: number
+  isLoading: boolean
+  onCardClick: (card: ContactCardType) => void
+  onLoadMore: (stage: PipelineStage, cursor: StageCursor) => void
+}
+
+// Memoized so that loading one column (or typing in the detail modal)
+// does not re-render the other columns and their cards
+const PipelineColumn = memo(function PipelineColumn({
+  stage, cards, totalCount, isLoading, onCardClick, onLoadMore
+}: PipelineColumnProps) {
+  const config = STAGE_CONFIG[stage]
+  const hasMore = cards.length < totalCount
+
+  const loadMore = () => {
+    const last = cards[cards.length - 1]
+    if (!last) return
+    onLoadMore(stage, { updatedAt: last.status_updated_at ?? null, id: last.contato_id })
+  }
+
+  return (
+    <div className="flex flex-col">
+      {/* Column Header */}
+      <Card className={`${config.bgColor} border mb-3`}>
+        <CardHeader className="py-3 px-4">
+          <CardTitle className={`text-sm font-semibold flex items-center justify-between ${config.color}`}>
+            <span className="flex items-center gap-2">
+              {config.icon} {stage}
+            </span>
+            <span className="bg-white rounded-full px-2 py-0.5 text-xs">
+              {totalCount.toLocaleString('pt-BR')}
+            </span>
+          </CardTitle>
+        </CardHeader>
+      </Card>
+
+      {/* Cards */}
+      <div className="space-y-3 pipeline-column overflow-y-auto pr-1">
+        {isLoading && cards.length === 0 ? (
+          <div className="flex justify-center py-8">
+            <div className="animate-spin rounded-full h-6 w-6 border-b-2 border-gray-400" />
+          </div>
+        ) : cards.length === 0 ? (
+          <Card className="bg-gray-50">
+            <CardContent className="py-8 text-center text-gray-400 text-sm">
+              Nenhum contato
+            </CardContent>
+          </Card>
+        ) : (
+          <>
+            {cards.map((card) => (
+              <ContactCard
+                key={card.contato_id}
+                contact={card}
+                onClick={onCardClick}
+                onPrefetch={prefetchContactDetails}
+              />
+            ))}
+
+            {/* Load More Button */}
+            {hasMore && (
+              <Button
+                variant="ghost"
+                size="sm"
+                className="w-full text-gray-500"
+                onClick={loadMore}
+                disabled={isLoading}
+              >
+                {isLoading ? (
+                  <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-gray-400" />
+                ) : (
+                  <>
+                    <ChevronDown className="h-4 w-4 mr-1" />
+                    Carregar mais ({totalCount - cards.length})
+                  </>
+                )}
+              </Button>
+            )}
+          </>
+        )}
+      </div>
+    </div>
+  )
+})
@@ -0,0 +1,50 @@
+// In-memory TTL cache for Supabase read queries.
+// Writes call invalidateCache() so the next read always goes to the database.
+
+type CacheEntry = {
+  value: Promise<unknown>
+  expiresAt: number
+}
+
+const MAX_ENTRIES = 200
+
+const store = new Map<string, CacheEntry>()
+
+// Return the cached result for `key`, or run `fetcher` and cache its promise.
+// Caching the promise (not the resolved value) also dedupes concurrent calls.
+// `fetcher` must throw on error so failed requests are never cached.
+// `force` skips any cached entry and stores the new result (used by polling).
+export function cached<T>(
+  key: string,
+  ttlMs: number,
+  fetcher: () => Promise<T>,
+  { force = false }: { force?: boolean } = {}
+): Promise<T> {
+  const now = Date.now()
+  const hit = store.get(key)
+
+  if (!force && hit && hit.expiresAt > now) {
+    return hit.value as Promise<T>
+  }
+
+  const value = fetcher()
+  store.delete(key)
+  store.set(key, { value, expiresAt: now + ttlMs })
+
+  value.catch(() => {
+    if (store.get(key)?.value === value) store.delete(key)
+  })
+
+  // Evict the oldest entry once we go over the limit (Map keeps insertion order)
+  if (store.size > MAX_ENTRIES) {
+    const oldest = store.keys().next().value
+    if (oldest !== undefined) store.delete(oldest)
+  }
+
+  return value
+}
+
+// Drop every cached read. Call after any write to contatos/campaign_leads.
+export function invalidateCache() {
+  store.clear()
+}
@@ -1,6 +1,10 @@
 import { createBrowserClient } from '@supabase/ssr'
-import type { Database } from './types'
+import type { Database, Filters } from './types'
+import { cached } from './cache'
+import { nextDay } from './utils'
 
+// The one browser client for the whole app (data queries and auth), so every
+// request shares the same session, token refresh timer and connections
 export const supabase = createBrowserClient<Database>(
   process.env.NEXT_PUBLIC_SUPABASE_URL!,
   process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY!,
@@ -31,6 +35,100 @@ export async function withTimeout<T>(
   return Promise.race([promise, timeout])
 }
 
+// Distinct, sorted states for the filter dropdowns
+// (see migrations/016_estado_options.sql)
+export function fetchEstados(): Promise<string[]> {
+  return cached('estados', 600_000, async () => {
+    const { data, error } = await (supabase as any).rpc('get_estados')
+
+    if (error) throw error
+
+    return ((data as { estado: string }[]) || []).map(row => row.estado)
+  })
+}
+
+// Fetch contact counts for every pipeline stage in a single round-trip
+// (see migrations/002_stage_counts.sql). `fresh` always goes to the database.
+export function fetchStageCounts(
+  campaignId?: string,
+  { fresh = false }: { fresh?: boolean } = {}
+): Promise<Record<string, number>> {
+  return cached(`stage-counts:${campaignId || ''}`, 30_000, async () => {
+    const { data, error } = await (supabase as any).rpc('get_status_counts', {
+      p_campaign_id: campaignId || null,
+    })
+
+    if (error) throw error
+
+    const counts: Record<string, number> = {}
+    for (const row of (data as { status: string | null; n: number }[]) || []) {
+      if (row.status) counts[row.status] = Number(row.n)
+    }
+    return counts
+  }, { force: fresh })
+}
+
+// Columns of v_pipeline_cards rendered by ContactCard. Notes can be long and
+// are only shown in the detail modal, so they stay out of list queries.
+export const CARD_COLUMNS = [
+  'contato_id', 'contato_nome', 'contato_cpf', 'phone_display', 'all_phones',
+  'status', 'scheduled_for', 'status_updated_at',
+  'caso_id', 'caso_nome', 'caso_cpf', 'caso_cidade', 'caso_estado', 'caso_data_obito',
+  'caso_relatives_count', 'tipo_parentesco',
+].join(', ')
+
+// Text filters are matched with ILIKE, so surrounding whitespace and case
+// never change the result
+const TEXT_FILTERS = ['contactName', 'contactCpf', 'caseName', 'caseCpf', 'cidade'] as const
+
+export function normalizeFilters(filters: Filters): Filters {
+  const normalized = { ...filters }
+  for (const key of TEXT_FILTERS) {
+    normalized[key] = (filters[key] || '').trim().toLowerCase()
+  }
+  return normalized
+}
+
+// Cache key for a filter set; "  SP " and "sp" share an entry
+export function filtersKey(filters: Filters): string {
+  return JSON.stringify(normalizeFilters(filters))
+}
+
+// Apply the shared lead filters to a query on the v_pipeline_cards view
+// (see migrations/005_pipeline_cards_view.sql)
+export function applyCardFilters(query: any, rawFilters: Filters) {
+  const filters = normalizeFilters(rawFilters)
+  if (filters.campaignId) {
+    query = query.eq('campaign_leads.campaign_id', filters.campaignId)
+  }
+  if (filters.contactName) {
+    query = query.ilike('contato_nome', `%${filters.contactName}%`)
+  }
+  if (filters.contactCpf) {
+    query = query.ilike('contato_cpf', `%${filters.contactCpf}%`)
+  }
+  if (filters.caseName) {
+    query = query.ilike('caso_nome', `%${filters.caseName}%`)
+  }
+  if (filters.caseCpf) {
+    query = query.ilike('caso_cpf', `%${filters.caseCpf}%`)
+  }
+  if (filters.cidade) {
+    query = query.ilike('caso_cidade', `%${filters.cidade}%`)
+  }
+  if (filters.estado) {
+    query = query.eq('caso_estado', filters.estado)
+  }
+  if (filters.dateFrom) {
+    query = query.gte('data_obito', filters.dateFrom)
+  }
+  if (filters.dateTo) {
+    // Half-open range so the whole end day is included whatever the column's precision
+    query = query.lt('data_obito', nextDay(filters.dateTo))
+  }
+  return query
+}
+
 // Pipeline stages
 export const PIPELINE_STAGES = ['New', 'Attempted', 'In Progress', 'Scheduled', 'Won', 'Lost'] as const
 export type PipelineStage = typeof PIPELINE_STAGES[number]
@@ -43,3 +141,16 @@ export const STAGE_CONFIG: Record<PipelineStage, { color: string; bgColor: strin
   'Won': { color: 'text-green-600', bgColor: 'bg-green-50 border-green-200', icon: '🟢' },
   'Lost': { color: 'text-red-600', bgColor: 'bg-red-50 border-red-200', icon: '🔴' },
 }
+
+// Badge variant for each stage (see components/ui/badge.tsx)
+export const STAGE_BADGE_VARIANT: Record<string, string> = {
+  'New': 'new',
+  'Attempted': 'attempted',
+  'In Progress': 'inProgress',
+  'Scheduled': 'scheduled',
+  'Won': 'won',
+  'Lost': 'lost',
+}
+
+// Stages shown as Kanban columns ('New' leads live in the Leads tab)
+export const VISIBLE_STAGES = PIPELINE_STAGES.filter(stage => stage !== 'New')
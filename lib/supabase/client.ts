@@ -1,9 +0,0 @@
-import { createBrowserClient } from '@supabase/ssr'
-import { Database } from '@/lib/types'
-
-export function createClient() {
-  return createBrowserClient<Database>(
-    process.env.NEXT_PUBLIC_SUPABASE_URL!,
-    process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY!
-  )
-}
@@ -43,6 +43,8 @@ export interface Contato {
   telefone_2: string | null
   telefone_3: string | null
   telefone_4: string | null
+  // Generated from telefone_1..4 (migrations/015_contato_phones_column.sql)
+  telefones: string[] | null
   origem_dado: string | null
   created_at: string | null
   contacted: boolean | null
@@ -130,6 +132,11 @@ export interface Database {
         Update: Partial<CampaignLead>
       }
     }
+    Views: {
+      v_pipeline_cards: {
+        Row: ContactCard
+      }
+    }
   }
 }
 
@@ -141,7 +148,6 @@ export interface ContactCard {
   phone_display: string
   all_phones: string[]
   status: string
-  notes: string | null
   caso_id: string | null
   caso_nome: string
   caso_cpf: string | null
@@ -150,6 +156,9 @@ export interface ContactCard {
   caso_data_obito: string | null
   tipo_parentesco: string | null
   scheduled_for: string | null
+  status_updated_at?: string | null
+  // Number of relatives of the deceased (migrations/018_caso_relatives_count.sql)
+  caso_relatives_count?: number | null
 }
 
 export interface ContactDetails {
@@ -163,7 +172,7 @@ export interface RelativeInfo {
   contato_id: string
   nome: string | null
   cpf: string | null
-  telefone_1: string | null
+  telefone: string | null
   tipo_parentesco: string | null
   status: string | null
 }
@@ -15,6 +15,13 @@ export function formatDate(dateString: string | null): string {
   }
 }
 
+// 'YYYY-MM-DD' of the following day, for half-open date ranges (< next day)
+export function nextDay(date: string): string {
+  const d = new Date(`${date}T00:00:00Z`)
+  d.setUTCDate(d.getUTCDate() + 1)
+  return d.toISOString().slice(0, 10)
+}
+
 export function formatCPF(cpf: string | null): string {
   if (!cpf) return 'N/A'
   // Format as XXX.XXX.XXX-XX
@@ -36,18 +43,3 @@ export function formatPhone(phone: string | null): string {
   }
   return phone
 }
-
-export function aggregatePhones(contact: { 
-  telefone_1?: string | null
-  telefone_2?: string | null
-  telefone_3?: string | null
-  telefone_4?: string | null 
-}): string[] {
-  const phones = [
-    contact.telefone_1,
-    contact.telefone_2,
-    contact.telefone_3,
-    contact.telefone_4,
-  ]
-  return phones.filter((p): p is string => !!p && p.trim() !== '')
-}
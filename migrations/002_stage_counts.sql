@@ -0,0 +1,31 @@
+-- =============================================================================
+-- ObitFinder CRM - Stage Counts
+-- =============================================================================
+-- Returns the number of contacts per pipeline stage in a single round-trip,
+-- replacing one COUNT(*) request per stage.
+-- Optionally restricted to the contacts of a campaign.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION get_status_counts(p_campaign_id UUID DEFAULT NULL)
+RETURNS TABLE(status TEXT, n BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT c.status, count(*)::BIGINT AS n
+  FROM contatos c
+  WHERE p_campaign_id IS NULL
+     OR EXISTS (
+       SELECT 1
+       FROM campaign_leads cl
+       WHERE cl.contato_id = c.id
+         AND cl.campaign_id = p_campaign_id
+     )
+  GROUP BY c.status;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_status_counts(UUID) TO authenticated;
+
+-- =============================================================================
+-- VERIFICATION QUERIES
+-- =============================================================================
+-- SELECT * FROM get_status_counts();
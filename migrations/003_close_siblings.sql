@@ -0,0 +1,35 @@
+-- =============================================================================
+-- ObitFinder CRM - One-Win-Close-All
+-- =============================================================================
+-- When a contact is marked as Won, every other open relative of the same
+-- deceased is moved to Lost with an explanatory note. Doing this in one
+-- UPDATE replaces a per-relative SELECT + UPDATE loop in the client and
+-- makes the rule atomic.
+-- Returns the ids of the contacts that were closed.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION close_siblings(winner_id UUID)
+RETURNS SETOF UUID
+LANGUAGE sql
+VOLATILE
+AS $$
+  UPDATE contatos
+  SET status = 'Lost',
+      status_updated_at = NOW(),
+      notes = COALESCE(notes, '')
+        || E'\n[Auto-fechado: Outro familiar ganhou em '
+        || to_char(NOW() AT TIME ZONE 'America/Sao_Paulo', 'DD/MM/YYYY')
+        || ']'
+  WHERE id IN (
+      SELECT r.contato_id
+      FROM relacionamentos r
+      WHERE r.caso_id IN (
+        SELECT caso_id FROM relacionamentos WHERE contato_id = winner_id
+      )
+    )
+    AND id <> winner_id
+    AND COALESCE(status, '') NOT IN ('Won', 'Lost')
+  RETURNING id;
+$$;
+
+GRANT EXECUTE ON FUNCTION close_siblings(UUID) TO authenticated;
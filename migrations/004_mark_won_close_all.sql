@@ -0,0 +1,30 @@
+-- =============================================================================
+-- ObitFinder CRM - Mark Won + One-Win-Close-All
+-- =============================================================================
+-- Marks a contact as Won and closes its open relatives in the same
+-- transaction, so a partially applied "Won" is never visible.
+-- Returns {"closed": <number of relatives closed>}.
+-- Requires 003_close_siblings.sql.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION mark_won_close_all(winner_id UUID)
+RETURNS JSON
+LANGUAGE plpgsql
+VOLATILE
+AS $$
+DECLARE
+  closed_count INTEGER;
+BEGIN
+  UPDATE contatos
+  SET status = 'Won',
+      status_updated_at = NOW(),
+      scheduled_for = NULL
+  WHERE id = winner_id;
+
+  SELECT count(*) INTO closed_count FROM close_siblings(winner_id);
+
+  RETURN json_build_object('closed', closed_count);
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION mark_won_close_all(UUID) TO authenticated;
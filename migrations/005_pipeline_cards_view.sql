@@ -0,0 +1,66 @@
+-- =============================================================================
+-- ObitFinder CRM - Pipeline Cards View
+-- =============================================================================
+-- One row per contact, already joined with its deceased and shaped like the
+-- ContactCard type used by the UI (lib/types.ts). Replaces the embedded
+-- relacionamentos -> contatos/casos query plus client-side flattening, phone
+-- aggregation and de-duplication.
+--
+-- The relationship is picked with a LATERAL ... LIMIT 1 rather than
+-- DISTINCT ON so that filters on status/nome/cidade can still be pushed
+-- down to the base tables and LIMIT stops early.
+-- security_invoker keeps the RLS policies of the base tables in effect.
+-- =============================================================================
+
+CREATE OR REPLACE VIEW v_pipeline_cards
+WITH (security_invoker = true)
+AS
+SELECT
+  c.id AS contato_id,
+  c.nome AS contato_nome,
+  c.cpf AS contato_cpf,
+  COALESCE(
+    NULLIF(c.telefone_1, ''),
+    NULLIF(c.telefone_2, ''),
+    NULLIF(c.telefone_3, ''),
+    NULLIF(c.telefone_4, ''),
+    ''
+  ) AS phone_display,
+  array_remove(
+    ARRAY[
+      NULLIF(c.telefone_1, ''),
+      NULLIF(c.telefone_2, ''),
+      NULLIF(c.telefone_3, ''),
+      NULLIF(c.telefone_4, '')
+    ],
+    NULL
+  ) AS all_phones,
+  c.status,
+  c.notes,
+  c.scheduled_for,
+  c.status_updated_at,
+  r.caso_id,
+  k.nome AS caso_nome,
+  k.cpf AS caso_cpf,
+  k.cidade AS caso_cidade,
+  k.estado AS caso_estado,
+  left(k.data_obito::TEXT, 10) AS caso_data_obito,
+  -- Raw value, used for date range filters
+  k.data_obito,
+  r.tipo_parentesco
+FROM contatos c
+JOIN LATERAL (
+  SELECT rel.caso_id, rel.tipo_parentesco
+  FROM relacionamentos rel
+  WHERE rel.contato_id = c.id
+  ORDER BY rel.id
+  LIMIT 1
+) r ON TRUE
+LEFT JOIN casos k ON k.id = r.caso_id;
+
+GRANT SELECT ON v_pipeline_cards TO authenticated;
+
+-- =============================================================================
+-- VERIFICATION QUERIES
+-- =============================================================================
+-- SELECT * FROM v_pipeline_cards WHERE status = 'New' LIMIT 15;
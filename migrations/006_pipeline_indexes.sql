@@ -0,0 +1,21 @@
+-- =============================================================================
+-- ObitFinder CRM - Pipeline Indexes
+-- =============================================================================
+-- Indexes for the lookups made on every pipeline render and status change.
+-- =============================================================================
+
+-- 1. Stage listings and counts filter on status
+CREATE INDEX IF NOT EXISTS idx_contatos_status_id ON contatos(status, id);
+
+-- 2. Contact -> deceased lookups (v_pipeline_cards lateral join, contact detail)
+CREATE INDEX IF NOT EXISTS idx_rel_contato ON relacionamentos(contato_id, id);
+
+-- 3. Deceased -> relatives lookups (One-Win-Close-All, other relatives list)
+CREATE INDEX IF NOT EXISTS idx_rel_caso ON relacionamentos(caso_id);
+
+-- 4. Campaign filter on the pipeline and stage counts
+CREATE INDEX IF NOT EXISTS idx_campaign_leads_contato ON campaign_leads(contato_id);
+CREATE INDEX IF NOT EXISTS idx_campaign_leads_campaign ON campaign_leads(campaign_id);
+
+-- idx_contatos_status (001) is covered by idx_contatos_status_id
+DROP INDEX IF EXISTS idx_contatos_status;
@@ -0,0 +1,17 @@
+-- =============================================================================
+-- ObitFinder CRM - Trigram Index for the City Filter
+-- =============================================================================
+-- The city filter is a substring match (ILIKE '%term%'), which a btree index
+-- cannot serve. A pg_trgm GIN index lets the planner use an index for it
+-- without any change to the query.
+-- =============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+
+CREATE INDEX IF NOT EXISTS idx_casos_cidade_trgm
+ON casos USING gin (cidade extensions.gin_trgm_ops);
+
+-- =============================================================================
+-- VERIFICATION QUERIES
+-- =============================================================================
+-- EXPLAIN SELECT id FROM casos WHERE cidade ILIKE '%paulo%';
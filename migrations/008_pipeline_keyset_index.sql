@@ -0,0 +1,10 @@
+-- =============================================================================
+-- ObitFinder CRM - Pipeline Keyset Pagination Index
+-- =============================================================================
+-- Pipeline columns are paged with a keyset on
+-- (status_updated_at DESC NULLS LAST, id DESC) within a status, so each
+-- "Load more" reads one page instead of re-reading everything loaded so far.
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_contatos_status_updated
+ON contatos(status, status_updated_at DESC NULLS LAST, id DESC);
@@ -0,0 +1,34 @@
+-- =============================================================================
+-- ObitFinder CRM - One-Win-Close-All Note Formatting
+-- =============================================================================
+-- Appends the auto-close note with concat_ws so contacts without notes do
+-- not start with an empty line. Everything else is unchanged from
+-- 003_close_siblings.sql.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION close_siblings(winner_id UUID)
+RETURNS SETOF UUID
+LANGUAGE sql
+VOLATILE
+AS $$
+  UPDATE contatos
+  SET status = 'Lost',
+      status_updated_at = NOW(),
+      notes = concat_ws(
+        E'\n',
+        NULLIF(notes, ''),
+        '[Auto-fechado: Outro familiar ganhou em '
+          || to_char(NOW() AT TIME ZONE 'America/Sao_Paulo', 'DD/MM/YYYY')
+          || ']'
+      )
+  WHERE id IN (
+      SELECT r.contato_id
+      FROM relacionamentos r
+      WHERE r.caso_id IN (
+        SELECT caso_id FROM relacionamentos WHERE contato_id = winner_id
+      )
+    )
+    AND id <> winner_id
+    AND COALESCE(status, '') NOT IN ('Won', 'Lost')
+  RETURNING id;
+$$;
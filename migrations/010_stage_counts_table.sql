@@ -0,0 +1,96 @@
+-- =============================================================================
+-- ObitFinder CRM - Pre-aggregated Stage Counts
+-- =============================================================================
+-- Keeps a running count of contacts per status in stage_counts, maintained
+-- by a row trigger on contatos (+1 / -1), so the unfiltered stage counts
+-- read every pipeline/dashboard load are an O(stages) lookup instead of a
+-- GROUP BY over contatos.
+--
+-- A counter table is used instead of a materialized view: refreshing a
+-- materialized view on every status change would rescan contatos per write.
+-- Requires 002_stage_counts.sql.
+-- =============================================================================
+
+BEGIN;
+
+-- 1. Counter table
+CREATE TABLE IF NOT EXISTS stage_counts (
+  status TEXT PRIMARY KEY,
+  n BIGINT NOT NULL DEFAULT 0
+);
+
+ALTER TABLE stage_counts ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow authenticated reads" ON stage_counts;
+CREATE POLICY "Allow authenticated reads" ON stage_counts
+FOR SELECT TO authenticated
+USING (true);
+
+-- 2. Trigger keeping the counters in sync with contatos.status
+CREATE OR REPLACE FUNCTION maintain_stage_counts()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' AND OLD.status IS NOT DISTINCT FROM NEW.status THEN
+    RETURN NULL;
+  END IF;
+
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status IS NOT NULL THEN
+    UPDATE stage_counts SET n = n - 1 WHERE status = OLD.status;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status IS NOT NULL THEN
+    INSERT INTO stage_counts (status, n) VALUES (NEW.status, 1)
+    ON CONFLICT (status) DO UPDATE SET n = stage_counts.n + 1;
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_stage_counts ON contatos;
+CREATE TRIGGER trg_stage_counts
+AFTER INSERT OR DELETE OR UPDATE OF status ON contatos
+FOR EACH ROW EXECUTE FUNCTION maintain_stage_counts();
+
+-- 3. Backfill while blocking concurrent writes so no change is missed
+LOCK TABLE contatos IN SHARE ROW EXCLUSIVE MODE;
+
+DELETE FROM stage_counts;
+INSERT INTO stage_counts (status, n)
+SELECT status, count(*)
+FROM contatos
+WHERE status IS NOT NULL
+GROUP BY status;
+
+-- 4. Serve unfiltered counts from the counters; campaign-scoped counts
+--    are still computed on demand
+CREATE OR REPLACE FUNCTION get_status_counts(p_campaign_id UUID DEFAULT NULL)
+RETURNS TABLE(status TEXT, n BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT sc.status, sc.n
+  FROM stage_counts sc
+  WHERE p_campaign_id IS NULL
+
+  UNION ALL
+
+  SELECT c.status, count(*)::BIGINT
+  FROM contatos c
+  JOIN campaign_leads cl ON cl.contato_id = c.id
+  WHERE p_campaign_id IS NOT NULL
+    AND cl.campaign_id = p_campaign_id
+  GROUP BY c.status;
+$$;
+
+COMMIT;
+
+-- =============================================================================
+-- VERIFICATION QUERIES
+-- =============================================================================
+-- SELECT sc.status, sc.n, (SELECT count(*) FROM contatos c WHERE c.status = sc.status) AS actual
+-- FROM stage_counts sc;
@@ -0,0 +1,36 @@
+-- =============================================================================
+-- ObitFinder CRM - Dashboard Location Counts
+-- =============================================================================
+-- Top cities / states by number of cases, aggregated in the database so the
+-- dashboard receives at most p_limit rows instead of downloading casos rows
+-- and counting them in the browser.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION get_top_cities(p_limit INTEGER DEFAULT 10)
+RETURNS TABLE(city TEXT, count BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT cidade, count(*)
+  FROM casos
+  WHERE cidade IS NOT NULL AND cidade <> ''
+  GROUP BY cidade
+  ORDER BY 2 DESC
+  LIMIT p_limit;
+$$;
+
+CREATE OR REPLACE FUNCTION get_top_states(p_limit INTEGER DEFAULT 10)
+RETURNS TABLE(state TEXT, count BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT estado, count(*)
+  FROM casos
+  WHERE estado IS NOT NULL AND estado <> ''
+  GROUP BY estado
+  ORDER BY 2 DESC
+  LIMIT p_limit;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_top_cities(INTEGER) TO authenticated;
+GRANT EXECUTE ON FUNCTION get_top_states(INTEGER) TO authenticated;
@@ -0,0 +1,25 @@
+-- =============================================================================
+-- ObitFinder CRM - Status Timestamp Trigger
+-- =============================================================================
+-- Stamps contatos.status_updated_at with the database clock whenever the
+-- status actually changes, so clients no longer send their own timestamps
+-- (and re-sending the same status does not move the contact in the
+-- pipeline ordering).
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION touch_status_ts()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.status_updated_at := NOW();
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_touch_status ON contatos;
+CREATE TRIGGER trg_touch_status
+BEFORE UPDATE OF status ON contatos
+FOR EACH ROW
+WHEN (OLD.status IS DISTINCT FROM NEW.status)
+EXECUTE FUNCTION touch_status_ts();
@@ -0,0 +1,30 @@
+-- =============================================================================
+-- ObitFinder CRM - Trigram Indexes for the Search Filters
+-- =============================================================================
+-- 007 covered the city filter. The name and CPF filters (contact and deceased)
+-- and the campaign name filter are the same ILIKE '%term%' substring match, so
+-- they get the same pg_trgm GIN indexes. No query changes are needed.
+-- =============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+
+CREATE INDEX IF NOT EXISTS idx_contatos_nome_trgm
+ON contatos USING gin (nome extensions.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_contatos_cpf_trgm
+ON contatos USING gin (cpf extensions.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_casos_nome_trgm
+ON casos USING gin (nome extensions.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_casos_cpf_trgm
+ON casos USING gin (cpf extensions.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_campaigns_name_trgm
+ON campaigns USING gin (name extensions.gin_trgm_ops);
+
+-- =============================================================================
+-- VERIFICATION QUERIES
+-- =============================================================================
+-- EXPLAIN SELECT id FROM contatos WHERE nome ILIKE '%silva%';
+-- EXPLAIN SELECT id FROM casos WHERE cpf ILIKE '%123%';
@@ -0,0 +1,50 @@
+-- =============================================================================
+-- ObitFinder CRM - Save Campaign
+-- =============================================================================
+-- Creates or updates a campaign and applies its lead changes in a single call
+-- and a single transaction, instead of one request per table.
+-- p_id NULL creates a new campaign. Returns the campaign id.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION save_campaign(
+  p_id UUID,
+  p_name campaigns.name%TYPE,
+  p_description campaigns.description%TYPE,
+  p_status campaigns.status%TYPE,
+  p_platforms campaigns.platforms%TYPE,
+  p_created_by UUID DEFAULT NULL,
+  p_add_leads UUID[] DEFAULT '{}',
+  p_remove_leads UUID[] DEFAULT '{}'
+)
+RETURNS UUID
+LANGUAGE plpgsql
+VOLATILE
+AS $$
+DECLARE
+  v_id UUID := p_id;
+BEGIN
+  IF v_id IS NULL THEN
+    INSERT INTO campaigns (name, description, status, platforms, created_by)
+    VALUES (p_name, p_description, p_status, p_platforms, p_created_by)
+    RETURNING id INTO v_id;
+  ELSE
+    UPDATE campaigns
+    SET name = p_name,
+        description = p_description,
+        status = p_status,
+        platforms = p_platforms
+    WHERE id = v_id;
+  END IF;
+
+  DELETE FROM campaign_leads
+  WHERE campaign_id = v_id
+    AND contato_id = ANY(p_remove_leads);
+
+  INSERT INTO campaign_leads (campaign_id, contato_id)
+  SELECT v_id, unnest(p_add_leads);
+
+  RETURN v_id;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION save_campaign TO authenticated;
@@ -0,0 +1,61 @@
+-- =============================================================================
+-- ObitFinder CRM - Stored Phone List on Contatos
+-- =============================================================================
+-- telefone_1..4 are collapsed into a generated telefones array (trimmed, empty
+-- values dropped) that Postgres keeps up to date on write. v_pipeline_cards
+-- and the contact detail read it instead of rebuilding the list per row.
+-- Requires 005_pipeline_cards_view.sql.
+-- =============================================================================
+
+ALTER TABLE contatos
+ADD COLUMN IF NOT EXISTS telefones TEXT[]
+GENERATED ALWAYS AS (
+  array_remove(
+    ARRAY[
+      NULLIF(btrim(telefone_1), ''),
+      NULLIF(btrim(telefone_2), ''),
+      NULLIF(btrim(telefone_3), ''),
+      NULLIF(btrim(telefone_4), '')
+    ],
+    NULL
+  )
+) STORED;
+
+CREATE OR REPLACE VIEW v_pipeline_cards
+WITH (security_invoker = true)
+AS
+SELECT
+  c.id AS contato_id,
+  c.nome AS contato_nome,
+  c.cpf AS contato_cpf,
+  COALESCE(c.telefones[1], '') AS phone_display,
+  c.telefones AS all_phones,
+  c.status,
+  c.notes,
+  c.scheduled_for,
+  c.status_updated_at,
+  r.caso_id,
+  k.nome AS caso_nome,
+  k.cpf AS caso_cpf,
+  k.cidade AS caso_cidade,
+  k.estado AS caso_estado,
+  left(k.data_obito::TEXT, 10) AS caso_data_obito,
+  -- Raw value, used for date range filters
+  k.data_obito,
+  r.tipo_parentesco
+FROM contatos c
+JOIN LATERAL (
+  SELECT rel.caso_id, rel.tipo_parentesco
+  FROM relacionamentos rel
+  WHERE rel.contato_id = c.id
+  ORDER BY rel.id
+  LIMIT 1
+) r ON TRUE
+LEFT JOIN casos k ON k.id = r.caso_id;
+
+GRANT SELECT ON v_pipeline_cards TO authenticated;
+
+-- =============================================================================
+-- VERIFICATION QUERIES
+-- =============================================================================
+-- SELECT id, telefone_1, telefone_2, telefones FROM contatos LIMIT 10;
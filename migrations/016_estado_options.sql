@@ -0,0 +1,22 @@
+-- =============================================================================
+-- ObitFinder CRM - State Filter Options
+-- =============================================================================
+-- Distinct states for the filter dropdowns, computed in the database. The
+-- clients used to download the estado column of every caso (capped at the
+-- API row limit) and de-duplicate it in the browser.
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_casos_estado ON casos(estado);
+
+CREATE OR REPLACE FUNCTION get_estados()
+RETURNS TABLE(estado TEXT)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT DISTINCT estado
+  FROM casos
+  WHERE estado IS NOT NULL AND estado <> ''
+  ORDER BY 1;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_estados() TO authenticated;
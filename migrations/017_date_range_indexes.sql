@@ -0,0 +1,12 @@
+-- =============================================================================
+-- ObitFinder CRM - Date Range Indexes
+-- =============================================================================
+-- The date filters are plain half-open ranges (>= start AND < day after end),
+-- so btree indexes on the raw columns can serve them.
+-- =============================================================================
+
+-- Date of death filter (pipeline, leads, campaign lead picker)
+CREATE INDEX IF NOT EXISTS idx_casos_data_obito ON casos(data_obito DESC);
+
+-- Campaign creation date filter
+CREATE INDEX IF NOT EXISTS idx_campaigns_created_at ON campaigns(created_at DESC);
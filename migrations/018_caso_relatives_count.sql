@@ -0,0 +1,106 @@
+-- =============================================================================
+-- ObitFinder CRM - Relatives Count per Caso
+-- =============================================================================
+-- casos.relatives_count holds the number of relacionamentos of each deceased.
+-- A row trigger on relacionamentos keeps it current (+1 / -1), and
+-- v_pipeline_cards exposes it so the cards can show it without another query.
+--
+-- As in 010, a counter column is used instead of a materialized view, which
+-- would have to be refreshed (a full rescan) on every new relationship.
+-- Requires 015_contato_phones_column.sql.
+-- =============================================================================
+
+BEGIN;
+
+-- 1. Counter column
+ALTER TABLE casos
+ADD COLUMN IF NOT EXISTS relatives_count INTEGER NOT NULL DEFAULT 0;
+
+-- 2. Trigger keeping it in sync with relacionamentos
+CREATE OR REPLACE FUNCTION maintain_relatives_count()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' AND OLD.caso_id IS NOT DISTINCT FROM NEW.caso_id THEN
+    RETURN NULL;
+  END IF;
+
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.caso_id IS NOT NULL THEN
+    UPDATE casos SET relatives_count = relatives_count - 1 WHERE id = OLD.caso_id;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.caso_id IS NOT NULL THEN
+    UPDATE casos SET relatives_count = relatives_count + 1 WHERE id = NEW.caso_id;
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_relatives_count ON relacionamentos;
+CREATE TRIGGER trg_relatives_count
+AFTER INSERT OR DELETE OR UPDATE OF caso_id ON relacionamentos
+FOR EACH ROW EXECUTE FUNCTION maintain_relatives_count();
+
+-- 3. Backfill while blocking concurrent writes so no change is missed
+LOCK TABLE relacionamentos IN SHARE ROW EXCLUSIVE MODE;
+
+UPDATE casos k
+SET relatives_count = COALESCE(r.n, 0)
+FROM casos k2
+LEFT JOIN (
+  SELECT caso_id, count(*) AS n
+  FROM relacionamentos
+  GROUP BY caso_id
+) r ON r.caso_id = k2.id
+WHERE k.id = k2.id
+  AND k.relatives_count IS DISTINCT FROM COALESCE(r.n, 0);
+
+-- 4. Expose it on the pipeline cards
+CREATE OR REPLACE VIEW v_pipeline_cards
+WITH (security_invoker = true)
+AS
+SELECT
+  c.id AS contato_id,
+  c.nome AS contato_nome,
+  c.cpf AS contato_cpf,
+  COALESCE(c.telefones[1], '') AS phone_display,
+  c.telefones AS all_phones,
+  c.status,
+  c.notes,
+  c.scheduled_for,
+  c.status_updated_at,
+  r.caso_id,
+  k.nome AS caso_nome,
+  k.cpf AS caso_cpf,
+  k.cidade AS caso_cidade,
+  k.estado AS caso_estado,
+  left(k.data_obito::TEXT, 10) AS caso_data_obito,
+  -- Raw value, used for date range filters
+  k.data_obito,
+  r.tipo_parentesco,
+  -- Appended last so CREATE OR REPLACE VIEW keeps the existing columns
+  k.relatives_count AS caso_relatives_count
+FROM contatos c
+JOIN LATERAL (
+  SELECT rel.caso_id, rel.tipo_parentesco
+  FROM relacionamentos rel
+  WHERE rel.contato_id = c.id
+  ORDER BY rel.id
+  LIMIT 1
+) r ON TRUE
+LEFT JOIN casos k ON k.id = r.caso_id;
+
+GRANT SELECT ON v_pipeline_cards TO authenticated;
+
+COMMIT;
+
+-- =============================================================================
+-- VERIFICATION QUERIES
+-- =============================================================================
+-- SELECT k.id, k.relatives_count, count(r.id)
+-- FROM casos k LEFT JOIN relacionamentos r ON r.caso_id = k.id
+-- GROUP BY k.id HAVING k.relatives_count <> count(r.id);
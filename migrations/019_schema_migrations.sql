@@ -0,0 +1,29 @@
+-- =============================================================================
+-- ObitFinder CRM - Applied Migrations Log
+-- =============================================================================
+-- schema_migrations records one row per migration file that has been run.
+-- Every migration from 020 on ends by inserting its own version, so
+--
+--   SELECT version FROM schema_migrations ORDER BY version;
+--
+-- compared with the files in migrations/ shows exactly what is left to run.
+-- Migrations are applied in numeric order, so 001-019 are recorded here.
+--
+-- Replaces missing_schema_objects(), a hand-kept list of objects that could
+-- not see redefined functions or views.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+  version TEXT PRIMARY KEY,
+  applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Only readable from the SQL editor / service role
+ALTER TABLE schema_migrations ENABLE ROW LEVEL SECURITY;
+
+INSERT INTO schema_migrations (version)
+SELECT to_char(v, 'FM000')
+FROM generate_series(1, 19) AS v
+ON CONFLICT (version) DO NOTHING;
+
+DROP FUNCTION IF EXISTS missing_schema_objects();
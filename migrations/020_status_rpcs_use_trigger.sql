@@ -0,0 +1,72 @@
+-- =============================================================================
+-- ObitFinder CRM - Let the Trigger Stamp Status Changes in the RPCs
+-- =============================================================================
+-- close_siblings and mark_won_close_all no longer assign status_updated_at
+-- themselves. trg_touch_status (012) stamps it only when the status really
+-- changes, so marking an already-Won contact as Won again no longer bumps
+-- its timestamp or moves it in the pipeline ordering.
+-- close_siblings also only closes the relatives of the one deceased shown in
+-- the contact modal (the relationship with the lowest id, as picked by
+-- v_pipeline_cards), matching the relatives the modal warns about. A winner
+-- linked to several casos no longer closes relatives of the others.
+-- Everything else is unchanged from 004_mark_won_close_all.sql and
+-- 009_close_siblings_note.sql.
+-- Requires 012_touch_status_timestamp.sql and 019_schema_migrations.sql.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION close_siblings(winner_id UUID)
+RETURNS SETOF UUID
+LANGUAGE sql
+VOLATILE
+AS $$
+  UPDATE contatos
+  SET status = 'Lost',
+      notes = concat_ws(
+        E'\n',
+        NULLIF(notes, ''),
+        '[Auto-fechado: Outro familiar ganhou em '
+          || to_char(NOW() AT TIME ZONE 'America/Sao_Paulo', 'DD/MM/YYYY')
+          || ']'
+      )
+  WHERE id IN (
+      SELECT r.contato_id
+      FROM relacionamentos r
+      -- Only the deceased the UI shows for the winner: the same relationship
+      -- v_pipeline_cards and the contact modal pick (lowest id)
+      WHERE r.caso_id = (
+        SELECT caso_id
+        FROM relacionamentos
+        WHERE contato_id = winner_id
+        ORDER BY id
+        LIMIT 1
+      )
+    )
+    AND id <> winner_id
+    AND COALESCE(status, '') NOT IN ('Won', 'Lost')
+  RETURNING id;
+$$;
+
+CREATE OR REPLACE FUNCTION mark_won_close_all(winner_id UUID)
+RETURNS JSON
+LANGUAGE plpgsql
+VOLATILE
+AS $$
+DECLARE
+  closed_count INTEGER;
+BEGIN
+  UPDATE contatos
+  SET status = 'Won',
+      scheduled_for = NULL
+  WHERE id = winner_id;
+
+  SELECT count(*) INTO closed_count FROM close_siblings(winner_id);
+
+  RETURN json_build_object('closed', closed_count);
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION close_siblings(UUID) TO authenticated;
+GRANT EXECUTE ON FUNCTION mark_won_close_all(UUID) TO authenticated;
+
+INSERT INTO schema_migrations (version) VALUES ('020')
+ON CONFLICT (version) DO NOTHING;
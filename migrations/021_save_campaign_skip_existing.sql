@@ -0,0 +1,65 @@
+-- =============================================================================
+-- ObitFinder CRM - Save Campaign Skips Leads Already Added
+-- =============================================================================
+-- save_campaign no longer fails when a lead in p_add_leads is already in the
+-- campaign (e.g. another user added it while the modal was open). The
+-- unique key violation used to roll back the whole save, including the
+-- campaign row edits. Leads already linked, and duplicates within
+-- p_add_leads, are now skipped.
+-- Everything else is unchanged from 014_save_campaign.sql.
+-- Requires 019_schema_migrations.sql.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION save_campaign(
+  p_id UUID,
+  p_name campaigns.name%TYPE,
+  p_description campaigns.description%TYPE,
+  p_status campaigns.status%TYPE,
+  p_platforms campaigns.platforms%TYPE,
+  p_created_by UUID DEFAULT NULL,
+  p_add_leads UUID[] DEFAULT '{}',
+  p_remove_leads UUID[] DEFAULT '{}'
+)
+RETURNS UUID
+LANGUAGE plpgsql
+VOLATILE
+AS $$
+DECLARE
+  v_id UUID := p_id;
+BEGIN
+  IF v_id IS NULL THEN
+    INSERT INTO campaigns (name, description, status, platforms, created_by)
+    VALUES (p_name, p_description, p_status, p_platforms, p_created_by)
+    RETURNING id INTO v_id;
+  ELSE
+    UPDATE campaigns
+    SET name = p_name,
+        description = p_description,
+        status = p_status,
+        platforms = p_platforms
+    WHERE id = v_id;
+  END IF;
+
+  DELETE FROM campaign_leads
+  WHERE campaign_id = v_id
+    AND contato_id = ANY(p_remove_leads);
+
+  -- Another user may have added the same lead after the modal was opened;
+  -- skip it instead of failing the unique key and rolling back the save
+  INSERT INTO campaign_leads (campaign_id, contato_id)
+  SELECT DISTINCT v_id, a.contato_id
+  FROM unnest(p_add_leads) AS a(contato_id)
+  WHERE NOT EXISTS (
+    SELECT 1 FROM campaign_leads cl
+    WHERE cl.campaign_id = v_id
+      AND cl.contato_id = a.contato_id
+  );
+
+  RETURN v_id;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION save_campaign TO authenticated;
+
+INSERT INTO schema_migrations (version) VALUES ('021')
+ON CONFLICT (version) DO NOTHING;